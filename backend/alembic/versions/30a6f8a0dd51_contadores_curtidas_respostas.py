@@ -0,0 +1,42 @@
+"""contadores de curtidas e respostas
+
+Revision ID: 30a6f8a0dd51
+Revises: eb14a22d7a63
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '30a6f8a0dd51'
+down_revision: Union[str, Sequence[str], None] = 'eb14a22d7a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabela in ('comentarios', 'enquetes'):
+        op.add_column(tabela, sa.Column('curtidas_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(tabela, sa.Column('respostas_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE comentarios SET "
+        "curtidas_count = (SELECT COUNT(*) FROM curtidas WHERE curtidas.comentario_id = comentarios.id), "
+        "respostas_count = (SELECT COUNT(*) FROM respostas WHERE respostas.comentario_id = comentarios.id)"
+    )
+    op.execute(
+        "UPDATE enquetes SET "
+        "curtidas_count = (SELECT COUNT(*) FROM curtidas WHERE curtidas.enquete_id = enquetes.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela in ('enquetes', 'comentarios'):
+        op.drop_column(tabela, 'respostas_count')
+        op.drop_column(tabela, 'curtidas_count')
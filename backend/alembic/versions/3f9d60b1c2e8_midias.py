@@ -0,0 +1,37 @@
+"""midias enderecadas por conteudo
+
+Revision ID: 3f9d60b1c2e8
+Revises: 5b7e2c94d1a3
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d60b1c2e8'
+down_revision: Union[str, Sequence[str], None] = '5b7e2c94d1a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('midias',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('tamanho', sa.Integer(), nullable=False),
+    sa.Column('variantes', sa.String(length=100), server_default='', nullable=False),
+    sa.Column('criado_em', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('hash')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('midias')
@@ -0,0 +1,33 @@
+"""versao e atualizado_em para requisicoes condicionais
+
+Revision ID: 5b7e2c94d1a3
+Revises: c1000249995e
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c94d1a3'
+down_revision: Union[str, Sequence[str], None] = 'c1000249995e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tabela in ('usuarios', 'comentarios', 'enquetes'):
+        op.add_column(tabela, sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(tabela, sa.Column('atualizado_em', sa.DateTime(), server_default=sa.func.now(), nullable=True))
+        op.execute(f"UPDATE {tabela} SET atualizado_em = criado_em")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela in ('enquetes', 'comentarios', 'usuarios'):
+        op.drop_column(tabela, 'atualizado_em')
+        op.drop_column(tabela, 'versao')
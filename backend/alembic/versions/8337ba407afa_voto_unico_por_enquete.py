@@ -0,0 +1,37 @@
+"""voto unico por enquete
+
+Revision ID: 8337ba407afa
+Revises: 30a6f8a0dd51
+Create Date: 2026-10-18 09:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8337ba407afa'
+down_revision: Union[str, Sequence[str], None] = '30a6f8a0dd51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # remove votos duplicados gravados antes da restrição, mantendo o primeiro
+    op.execute(
+        "DELETE FROM votos WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM votos GROUP BY usuario_id, enquete_id) AS manter)"
+    )
+    op.execute(
+        "UPDATE opcoes_enquete SET "
+        "votos = (SELECT COUNT(*) FROM votos WHERE votos.opcao_id = opcoes_enquete.id)"
+    )
+    op.create_unique_constraint('uq_votos_usuario_enquete', 'votos', ['usuario_id', 'enquete_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_votos_usuario_enquete', 'votos', type_='unique')
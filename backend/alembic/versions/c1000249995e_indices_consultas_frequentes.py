@@ -0,0 +1,56 @@
+"""indices para as consultas frequentes
+
+Revision ID: c1000249995e
+Revises: 8337ba407afa
+Create Date: 2026-10-18 10:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1000249995e'
+down_revision: Union[str, Sequence[str], None] = '8337ba407afa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # curtidas repetidas de um mesmo usuário impediriam o índice único
+    op.execute(
+        "DELETE FROM curtidas WHERE comentario_id IS NOT NULL AND id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM curtidas "
+        "WHERE comentario_id IS NOT NULL GROUP BY usuario_id, comentario_id) AS manter)"
+    )
+    op.execute(
+        "UPDATE comentarios SET "
+        "curtidas_count = (SELECT COUNT(*) FROM curtidas WHERE curtidas.comentario_id = comentarios.id)"
+    )
+    op.create_unique_constraint('uq_curtidas_usuario_comentario', 'curtidas', ['usuario_id', 'comentario_id'])
+    op.create_index('ix_curtidas_comentario_id', 'curtidas', ['comentario_id'], unique=False)
+    op.create_index('ix_curtidas_enquete_id', 'curtidas', ['enquete_id'], unique=False)
+    op.create_index('ix_respostas_comentario_id', 'respostas', ['comentario_id'], unique=False)
+    op.create_index('ix_opcoes_enquete_enquete_id', 'opcoes_enquete', ['enquete_id'], unique=False)
+    op.create_index('ix_seguidor_seguindo_id', 'seguidor', ['seguindo_id', 'seguidor_id'], unique=False)
+    op.create_index('ix_comentarios_criado_em', 'comentarios', ['criado_em', 'id'], unique=False)
+    op.create_index('ix_comentarios_usuario_criado_em', 'comentarios', ['usuario_id', 'criado_em', 'id'], unique=False)
+    op.create_index('ix_enquetes_criado_em', 'enquetes', ['criado_em', 'id'], unique=False)
+    op.create_index('ix_enquetes_usuario_criado_em', 'enquetes', ['usuario_id', 'criado_em', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_enquetes_usuario_criado_em', table_name='enquetes')
+    op.drop_index('ix_enquetes_criado_em', table_name='enquetes')
+    op.drop_index('ix_comentarios_usuario_criado_em', table_name='comentarios')
+    op.drop_index('ix_comentarios_criado_em', table_name='comentarios')
+    op.drop_index('ix_seguidor_seguindo_id', table_name='seguidor')
+    op.drop_index('ix_opcoes_enquete_enquete_id', table_name='opcoes_enquete')
+    op.drop_index('ix_respostas_comentario_id', table_name='respostas')
+    op.drop_index('ix_curtidas_enquete_id', table_name='curtidas')
+    op.drop_index('ix_curtidas_comentario_id', table_name='curtidas')
+    op.drop_constraint('uq_curtidas_usuario_comentario', 'curtidas', type_='unique')
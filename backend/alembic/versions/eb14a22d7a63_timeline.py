@@ -0,0 +1,44 @@
+"""timeline
+
+Revision ID: eb14a22d7a63
+Revises: 99ff6d69f9dc
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'eb14a22d7a63'
+down_revision: Union[str, Sequence[str], None] = '99ff6d69f9dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('usuarios', sa.Column('popular', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_table('timeline',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('autor_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['autor_id'], ['usuarios.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_timeline_usuario_criado_em', 'timeline', ['usuario_id', 'criado_em', 'item_id'], unique=False)
+    op.create_index('ix_timeline_tipo_item', 'timeline', ['tipo', 'item_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_timeline_tipo_item', table_name='timeline')
+    op.drop_index('ix_timeline_usuario_criado_em', table_name='timeline')
+    op.drop_table('timeline')
+    op.drop_column('usuarios', 'popular')
@@ -1,15 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
-from main import bcrypt_context, ALGORITHM, SECRET_KEY, ACESS_TOKEN_EXPIRE_MINUTES
-from dependencies import pegar_sessao, verificar_token
+from main import ALGORITHM, SECRET_KEY, ACESS_TOKEN_EXPIRE_MINUTES
+from dependencies import pegar_sessao_async, verificar_token_async
+from senhas import gerar_hash, verificar_senha
+from broker import publicar
+from limites import limitar
 from models import Usuario
 from schemas import UsuarioSchema, LoginSchema
-from sqlalchemy.orm import Session
+from schemas_rede import UsuarioPublico
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
 from fastapi.security import HTTPBearer, OAuth2PasswordRequestForm, HTTPAuthorizationCredentials
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
+# as duas rotas de login dividem o mesmo balde por IP
+limite_login = limitar("login", por_ip="10/minute")
+limite_registro = limitar("registro", por_ip="5/minute")
+
 def criar_token(id_usuario, duracao_token = timedelta(minutes= int(ACESS_TOKEN_EXPIRE_MINUTES))):
     data_expiracao = datetime.now(timezone.utc) + duracao_token
     dic_info = {
@@ -19,32 +28,40 @@ def criar_token(id_usuario, duracao_token = timedelta(minutes= int(ACESS_TOKEN_E
     jwt_codificado = jwt.encode(dic_info, SECRET_KEY, algorithm=ALGORITHM)
     return jwt_codificado
 
-def autenticar_usuario(email: str, senha: str, sessao: Session):
-    usuario = sessao.query(Usuario).filter(Usuario.email == email).first()
-    if usuario and bcrypt_context.verify(senha, usuario.senha):
-        return usuario
-    return None
+async def autenticar_usuario(email: str, senha: str, sessao: AsyncSession):
+    usuario = (await sessao.execute(select(Usuario).where(Usuario.email == email))).scalar_one_or_none()
+    if not usuario:
+        return None
+    
+    senha_valida, novo_hash = await verificar_senha(senha, usuario.senha)
+    if not senha_valida:
+        return None
+    if novo_hash:
+        usuario.senha = novo_hash
+        await sessao.commit()
+    return usuario
 
 @auth_router.get("/")
 async def user_root():
     return {"mensagem": "Você está na rota de usuários"}
 
-@auth_router.post("/registrar")
-async def registrar_usuario(usuarioModelo: UsuarioSchema, sessao: Session = Depends(pegar_sessao)):
-    usuario_existente = sessao.query(Usuario).filter(Usuario.email == usuarioModelo.email).first()
+@auth_router.post("/registrar", dependencies=[Depends(limite_registro)])
+async def registrar_usuario(usuarioModelo: UsuarioSchema, sessao: AsyncSession = Depends(pegar_sessao_async)):
+    usuario_existente = (await sessao.execute(select(Usuario).where(Usuario.email == usuarioModelo.email))).scalar_one_or_none()
     
     if usuario_existente:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
     else:
-        senha_criptografada = bcrypt_context.hash(usuarioModelo.senha)
+        senha_criptografada = await gerar_hash(usuarioModelo.senha)
         novo_usuario = Usuario(usuarioModelo.nome, usuarioModelo.email, senha_criptografada)
         sessao.add(novo_usuario)
-        sessao.commit()
+        await sessao.commit()
+        await publicar("usuario_criado", usuario_id=novo_usuario.id, nome=novo_usuario.nome)
         return {"mensagem": "cadastro realizado com sucesso"}
     
-@auth_router.post("/login")
-async def login_usuario(login_schema: LoginSchema, session: Session = Depends(pegar_sessao)):
-    usuario_existente = autenticar_usuario(login_schema.email, login_schema.senha, session)
+@auth_router.post("/login", dependencies=[Depends(limite_login)])
+async def login_usuario(login_schema: LoginSchema, session: AsyncSession = Depends(pegar_sessao_async)):
+    usuario_existente = await autenticar_usuario(login_schema.email, login_schema.senha, session)
     
     if not usuario_existente:
         raise HTTPException(status_code=400, detail = "Email não está cadastrado ou credenciais incorretas")
@@ -53,9 +70,9 @@ async def login_usuario(login_schema: LoginSchema, session: Session = Depends(pe
         refresh_token = criar_token(usuario_existente.id, duracao_token=timedelta(days=7))
         return {"acess_token": acess_token, "token_type": "bearer", "refresh_token": refresh_token}
     
-@auth_router.post("/login-form")
-async def login_form(dados_formulario: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(pegar_sessao)):
-    usuario_existente = autenticar_usuario(dados_formulario.username, dados_formulario.password, session)
+@auth_router.post("/login-form", dependencies=[Depends(limite_login)])
+async def login_form(dados_formulario: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(pegar_sessao_async)):
+    usuario_existente = await autenticar_usuario(dados_formulario.username, dados_formulario.password, session)
     
     if not usuario_existente:
         raise HTTPException(status_code=400, detail = "Email não está cadastrado ou credenciais incorretas")
@@ -64,7 +81,7 @@ async def login_form(dados_formulario: OAuth2PasswordRequestForm = Depends(), se
         return {"acess_token": acess_token, "token_type": "bearer"}
     
 @auth_router.get("/refresh")
-async def use_refresh_token(usuario: Usuario = Depends(verificar_token)):
+async def use_refresh_token(usuario: UsuarioPublico = Depends(verificar_token_async)):
     acess_token = criar_token(usuario.id)
     return {"acess_token": acess_token, "token_type": "bearer"}
         
\ No newline at end of file
@@ -0,0 +1,202 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from sqlalchemy import DateTime, Date
+from models import db, Base
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Cada tabela vira um arquivo <tabela>.ndjson.gz, uma linha JSON por registro.
+# Uso (dentro de backend/, com DATABASE_URL apontando para o banco desejado):
+#   python backup.py exportar pasta/
+#   python backup.py importar pasta/
+
+LOTE_PADRAO = 5000
+CHECKPOINT = "checkpoint.json"
+
+def _padrao(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+def _linha_json(registro):
+    if orjson:
+        return orjson.dumps(registro, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(registro, default=_padrao, ensure_ascii=False) + "\n").encode("utf-8")
+
+def _tabelas(nomes):
+    # sorted_tables vem em ordem de dependência: usuarios antes de comentarios etc.
+    tabelas = Base.metadata.sorted_tables
+    if nomes:
+        desconhecidas = set(nomes) - {tabela.name for tabela in tabelas}
+        if desconhecidas:
+            raise SystemExit(f"Tabelas desconhecidas: {', '.join(sorted(desconhecidas))}")
+        tabelas = [tabela for tabela in tabelas if tabela.name in nomes]
+    return tabelas
+
+def _arquivo(pasta, tabela):
+    return os.path.join(pasta, f"{tabela.name}.ndjson.gz")
+
+def _relatorio(nome, linhas, inicio):
+    tempo = time.perf_counter() - inicio
+    print(f"{nome}: {linhas} linhas em {tempo:.1f}s ({linhas / tempo if tempo else 0:.0f} linhas/s)")
+
+def exportar(pasta, nomes, lote):
+    os.makedirs(pasta, exist_ok=True)
+    total, inicio_geral = 0, time.perf_counter()
+    with db.connect() as conexao:
+        # stream_results usa cursor do lado do servidor (SSCursor no MySQL) e
+        # yield_per busca `lote` linhas por vez: a memória não cresce com a tabela
+        conexao = conexao.execution_options(stream_results=True, yield_per=lote)
+        for tabela in _tabelas(nomes):
+            inicio, linhas = time.perf_counter(), 0
+            temporario = _arquivo(pasta, tabela) + ".tmp"
+            with gzip.open(temporario, "wb", compresslevel=6) as saida:
+                resultado = conexao.execute(tabela.select().order_by(*tabela.primary_key.columns))
+                for registro in resultado:
+                    saida.write(_linha_json(registro._asdict()))
+                    linhas += 1
+            os.replace(temporario, _arquivo(pasta, tabela))
+            _relatorio(tabela.name, linhas, inicio)
+            total += linhas
+    _relatorio("total", total, inicio_geral)
+
+def _conversores(tabela):
+    conversores = {}
+    for coluna in tabela.columns:
+        if isinstance(coluna.type, DateTime):
+            conversores[coluna.name] = datetime.fromisoformat
+        elif isinstance(coluna.type, Date):
+            conversores[coluna.name] = date.fromisoformat
+    return conversores
+
+def _ler(caminho, pular, conversores):
+    with gzip.open(caminho, "rb") as entrada:
+        for numero, linha in enumerate(entrada):
+            if numero < pular:
+                continue
+            registro = orjson.loads(linha) if orjson else json.loads(linha)
+            for coluna, converter in conversores.items():
+                if registro.get(coluna) is not None:
+                    registro[coluna] = converter(registro[coluna])
+            yield registro
+
+def _salvar_checkpoint(pasta, progresso):
+    caminho = os.path.join(pasta, CHECKPOINT)
+    with open(caminho + ".tmp", "w") as arquivo:
+        json.dump(progresso, arquivo)
+    os.replace(caminho + ".tmp", caminho)
+
+def _desligar_verificacoes(conexao):
+    if db.dialect.name == "mysql":
+        conexao.exec_driver_sql("SET foreign_key_checks = 0")
+        conexao.exec_driver_sql("SET unique_checks = 0")
+    elif db.dialect.name == "sqlite":
+        conexao.exec_driver_sql("PRAGMA foreign_keys = OFF")
+
+# uma lista de dicionários vira um único executemany no driver
+def _inserir(conexao, tabela, registros, ignorar_repetidos):
+    comando = tabela.insert()
+    if ignorar_repetidos:
+        comando = comando.prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+    conexao.execute(comando, registros)
+
+def importar(pasta, nomes, lote, adiar_indices):
+    caminho_checkpoint = os.path.join(pasta, CHECKPOINT)
+    progresso = {}
+    if os.path.exists(caminho_checkpoint):
+        with open(caminho_checkpoint) as arquivo:
+            progresso = json.load(arquivo)
+        print(f"Retomando a partir de {caminho_checkpoint}")
+    
+    Base.metadata.create_all(db)
+    total, inicio_geral = 0, time.perf_counter()
+    with db.connect() as conexao:
+        _desligar_verificacoes(conexao)
+        conexao.commit()
+        for tabela in _tabelas(nomes):
+            estado = progresso.get(tabela.name, {"linhas": 0, "concluida": False})
+            if estado["concluida"]:
+                print(f"{tabela.name}: já importada")
+                continue
+            if not os.path.exists(_arquivo(pasta, tabela)):
+                print(f"{tabela.name}: arquivo não encontrado, ignorada")
+                continue
+    
+            # índices secundários são criados uma vez no fim, em vez de
+            # atualizados a cada linha inserida
+            indices = [indice for indice in tabela.indexes if not indice.unique] if adiar_indices else []
+            for indice in indices:
+                indice.drop(conexao, checkfirst=True)
+            conexao.commit()
+    
+            inicio, linhas = time.perf_counter(), 0
+            # ao retomar, o primeiro lote pode já ter sido gravado antes do checkpoint
+            retomando = estado["linhas"] > 0
+            pendentes = []
+            for registro in _ler(_arquivo(pasta, tabela), estado["linhas"], _conversores(tabela)):
+                pendentes.append(registro)
+                if len(pendentes) >= lote:
+                    _inserir(conexao, tabela, pendentes, retomando)
+                    conexao.commit()
+                    retomando = False
+                    linhas += len(pendentes)
+                    estado["linhas"] += len(pendentes)
+                    progresso[tabela.name] = estado
+                    _salvar_checkpoint(pasta, progresso)
+                    pendentes = []
+            if pendentes:
+                _inserir(conexao, tabela, pendentes, retomando)
+                linhas += len(pendentes)
+                estado["linhas"] += len(pendentes)
+    
+            for indice in indices:
+                indice.create(conexao, checkfirst=True)
+            conexao.commit()
+            estado["concluida"] = True
+            progresso[tabela.name] = estado
+            _salvar_checkpoint(pasta, progresso)
+            _relatorio(tabela.name, linhas, inicio)
+            total += linhas
+    
+    if os.path.exists(caminho_checkpoint):
+        os.remove(caminho_checkpoint)
+    _relatorio("total", total, inicio_geral)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Exporta e importa as tabelas da rede social em NDJSON comprimido.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    
+    exportacao = subcomandos.add_parser("exportar", help="grava uma cópia de cada tabela em <pasta>/<tabela>.ndjson.gz")
+    exportacao.add_argument("pasta")
+    
+    importacao = subcomandos.add_parser(
+        "importar",
+        help="insere os arquivos de <pasta> no banco de DATABASE_URL; se interrompida, continua de onde parou"
+    )
+    importacao.add_argument("pasta")
+    importacao.add_argument(
+        "--manter-indices", action="store_true",
+        help="não remove os índices secundários durante a importação"
+    )
+    
+    for subparser in (exportacao, importacao):
+        subparser.add_argument("--tabelas", nargs="+", help="apenas estas tabelas (padrão: todas)")
+        subparser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="linhas por lote de leitura/inserção")
+    
+    args = parser.parse_args()
+    if args.comando == "exportar":
+        exportar(args.pasta, args.tabelas, args.lote)
+    else:
+        importar(args.pasta, args.tabelas, args.lote, not args.manter_indices)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from itertools import accumulate
+import httpx
+from sqlalchemy import event, select, func
+
+# no modo em processo todas as requisições vêm do mesmo cliente; com os limites
+# de uso ligados a carga mediria só respostas 429
+os.environ.setdefault("LIMITES_ATIVOS", "false")
+import main
+from auth_routes import criar_token
+from models import db, db_async, SessaoAsync, Usuario, Comentario, Curtida, Resposta, Enquete, Opcoes, Voto
+from benchmarks.dados import Zipf, PALAVRAS, SENHA
+
+# Reproduz uma mistura de requisições parecida com o uso real contra os
+# routers de auth, posts e social e grava p50/p95/p99, vazão e consultas SQL
+# por requisição de cada rota em JSON, para comparar entre commits.
+# Uso (dentro de backend/, depois de python -m benchmarks.dados):
+#   DATABASE_URL=sqlite:///bench.db python -m benchmarks.carga --saida antes.json
+#   DATABASE_URL=sqlite:///bench.db python -m benchmarks.carga --saida depois.json
+#   python -m benchmarks.comparar antes.json depois.json
+
+# consultas feitas pela requisição em andamento (a contextvar acompanha a
+# task do cliente até dentro do app, já que o transporte ASGI roda no mesmo loop)
+_consultas = contextvars.ContextVar("consultas", default=None)
+
+def _contar(*_):
+    contador = _consultas.get()
+    if contador is not None:
+        contador[0] += 1
+
+class Amostra:
+    def __init__(self, aleatorio, expoente):
+        self.aleatorio = aleatorio
+        self.expoente = expoente
+    
+    async def carregar(self, quantidade_tokens):
+        async with SessaoAsync() as session:
+            self.emails = dict((await session.execute(select(Usuario.id, Usuario.email))).all())
+            self.usuarios = list(self.emails)
+            self.posts = (await session.execute(select(Comentario.id))).scalars().all()
+            self.enquetes = (await session.execute(select(Enquete.id))).scalars().all()
+            self.opcoes = {}
+            for enquete_id, opcao_id in await session.execute(select(Opcoes.enquete_id, Opcoes.id)):
+                self.opcoes.setdefault(enquete_id, []).append(opcao_id)
+        if not self.usuarios or not self.posts:
+            raise SystemExit("Banco sem dados: rode python -m benchmarks.dados antes")
+        self._usuarios = Zipf(self.usuarios, self.expoente, self.aleatorio)
+        self._posts = Zipf(self.posts, self.expoente, self.aleatorio)
+        self._enquetes = Zipf(self.enquetes, self.expoente, self.aleatorio) if self.enquetes else None
+        # tokens gerados direto, para o bcrypt do login não dominar todas as rotas
+        self.tokens = {
+            id: {"Authorization": f"Bearer {criar_token(id)}"}
+            for id in self.aleatorio.sample(self.usuarios, min(quantidade_tokens, len(self.usuarios)))
+        }
+        self.logados = list(self.tokens)
+    
+    # o sorteio usa o gerador de cada cliente, para a sequência de requisições
+    # de cada um ser a mesma a cada execução
+    def usuario(self, aleatorio):
+        return self._usuarios.sortear(1, aleatorio)[0]
+    
+    def post(self, aleatorio):
+        return self._posts.sortear(1, aleatorio)[0]
+    
+    def enquete(self, aleatorio):
+        return self._enquetes.sortear(1, aleatorio)[0]
+    
+    def logado(self, aleatorio):
+        return self.tokens[aleatorio.choice(self.logados)]
+
+def _texto(aleatorio, minimo, maximo):
+    return " ".join(aleatorio.choices(PALAVRAS, k=aleatorio.randint(minimo, maximo)))
+
+# cada entrada: (peso, rota, função que recebe o gerador do cliente e devolve
+# método, caminho, corpo e cabeçalhos)
+def _mistura(amostra):
+    def publico(caminho):
+        return lambda a: ("GET", caminho(a), None, None)
+    
+    def logado(metodo, caminho, corpo=lambda a: None):
+        return lambda a: (metodo, caminho(a), corpo(a), amostra.logado(a))
+    
+    def votar(a):
+        enquete = amostra.enquete(a)
+        return "POST", f"/social/enquetes/{enquete}/votar", {"opcao_id": a.choice(amostra.opcoes[enquete])}, amostra.logado(a)
+    
+    def login(a):
+        return "POST", "/auth/login", {"email": amostra.emails[amostra.usuario(a)], "senha": SENHA}, None
+    
+    def comentario(a):
+        return "POST", "/posts/comentario", {
+            "usuario_id": amostra.usuario(a), "titulo": None, "conteudo": _texto(a, 5, 30), "midia": None
+        }, None
+    
+    mistura = [
+        (25, "GET /social/posts/listar", publico(lambda a: "/social/posts/listar")),
+        (15, "GET /social/timeline", logado("GET", lambda a: "/social/timeline")),
+        (12, "GET /social/posts/{id}", publico(lambda a: f"/social/posts/{amostra.post(a)}")),
+        (4, "GET /social/posts/{id}/respostas", publico(lambda a: f"/social/posts/{amostra.post(a)}/respostas")),
+        (8, "POST /social/posts/{id}/curtir", logado("POST", lambda a: f"/social/posts/{amostra.post(a)}/curtir")),
+        (3, "POST /social/posts/{id}/responder", logado(
+            "POST", lambda a: f"/social/posts/{amostra.post(a)}/responder", lambda a: {"conteudo": _texto(a, 3, 15)}
+        )),
+        (3, "POST /social/posts/criar", logado(
+            "POST", lambda a: "/social/posts/criar", lambda a: {"titulo": _texto(a, 2, 5), "conteudo": _texto(a, 5, 30)}
+        )),
+        (1, "POST /posts/comentario", comentario),
+        (6, "GET /social/usuarios/{id}/perfil", publico(lambda a: f"/social/usuarios/{amostra.usuario(a)}/perfil")),
+        (4, "GET /social/usuarios/{id}/seguidores", publico(lambda a: f"/social/usuarios/{amostra.usuario(a)}/seguidores")),
+        (2, "POST /social/usuarios/{id}/seguir", logado("POST", lambda a: f"/social/usuarios/{amostra.usuario(a)}/seguir")),
+        (2, "GET /social/usuarios/{id}/sugestoes", publico(lambda a: f"/social/usuarios/{amostra.usuario(a)}/sugestoes")),
+        (5, "GET /social/buscar", publico(lambda a: f"/social/buscar?q={_texto(a, 1, 2)}")),
+        (1, "POST /auth/login", login),
+    ]
+    if amostra.enquetes:
+        mistura += [
+            (4, "GET /social/enquetes/{id}", publico(lambda a: f"/social/enquetes/{amostra.enquete(a)}")),
+            (4, "POST /social/enquetes/{id}/votar", votar),
+            (3, "GET /social/enquetes/{id}/resultado", publico(lambda a: f"/social/enquetes/{amostra.enquete(a)}/resultado")),
+        ]
+    return mistura
+
+def _percentil(ordenados, p):
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+def _resumo(medicoes, duracao):
+    tempos = sorted(tempo for tempo, _, _ in medicoes)
+    consultas = [quantidade for _, _, quantidade in medicoes if quantidade is not None]
+    status = {}
+    for _, codigo, _ in medicoes:
+        status[str(codigo)] = status.get(str(codigo), 0) + 1
+    return {
+        "requisicoes": len(medicoes),
+        "status": dict(sorted(status.items())),
+        "rps": round(len(medicoes) / duracao, 1),
+        "media_ms": round(sum(tempos) / len(tempos) * 1000, 3),
+        "p50_ms": round(_percentil(tempos, 50) * 1000, 3),
+        "p95_ms": round(_percentil(tempos, 95) * 1000, 3),
+        "p99_ms": round(_percentil(tempos, 99) * 1000, 3),
+        "consultas_por_req": round(sum(consultas) / len(consultas), 2) if consultas else None
+    }
+
+async def _trabalhador(cliente, mistura, aleatorio, restantes, medicoes, contar):
+    pesos = list(accumulate(peso for peso, _, _ in mistura))
+    while restantes[0] > 0:
+        restantes[0] -= 1
+        _, rota, montar = aleatorio.choices(mistura, cum_weights=pesos)[0]
+        metodo, caminho, corpo, cabecalhos = montar(aleatorio)
+        contador = [0] if contar else None
+        marca = _consultas.set(contador)
+        inicio = time.perf_counter()
+        try:
+            resposta = await cliente.request(metodo, caminho, json=corpo, headers=cabecalhos)
+            codigo = resposta.status_code
+        except httpx.HTTPError:
+            codigo = "falha"
+        finally:
+            _consultas.reset(marca)
+        medicoes.setdefault(rota, []).append((time.perf_counter() - inicio, codigo, contador[0] if contar else None))
+
+async def _consistencia():
+    # com requisições concorrentes, os contadores mantidos por UPDATE atômico
+    # precisam continuar batendo com as linhas de origem
+    async with SessaoAsync() as session:
+        curtidas = select(func.count()).where(Curtida.comentario_id == Comentario.id).scalar_subquery()
+        respostas = select(func.count()).where(Resposta.comentario_id == Comentario.id).scalar_subquery()
+        votos = select(func.count()).where(Voto.opcao_id == Opcoes.id).scalar_subquery()
+        return {
+            "curtidas_count_divergentes": (await session.execute(
+                select(func.count()).select_from(Comentario).where(Comentario.curtidas_count != curtidas)
+            )).scalar(),
+            "respostas_count_divergentes": (await session.execute(
+                select(func.count()).select_from(Comentario).where(Comentario.respostas_count != respostas)
+            )).scalar(),
+            "votos_divergentes": (await session.execute(
+                select(func.count()).select_from(Opcoes).where(func.coalesce(Opcoes.votos, 0) != votos)
+            )).scalar()
+        }
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def executar(args):
+    aleatorio = random.Random(args.semente)
+    if args.url:
+        cliente = httpx.AsyncClient(base_url=args.url, timeout=30)
+        contar = False
+    else:
+        cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=30)
+        contar = True
+        event.listen(db_async.sync_engine, "before_cursor_execute", _contar)
+        event.listen(db, "before_cursor_execute", _contar)
+    
+    # contra um servidor externo a inicialização (índice de busca, grafo...) é dele
+    ciclo_de_vida = contextlib.nullcontext() if args.url else main.app.router.lifespan_context(main.app)
+    async with ciclo_de_vida, cliente:
+        amostra = Amostra(aleatorio, args.zipf)
+        await amostra.carregar(args.tokens)
+        mistura = _mistura(amostra)
+    
+        if args.aquecimento:
+            await asyncio.gather(*(
+                _trabalhador(cliente, mistura, random.Random(args.semente - 1 - i), [args.aquecimento // args.concorrencia], {}, contar)
+                for i in range(args.concorrencia)
+            ))
+    
+        medicoes = {}
+        restantes = [args.requisicoes]
+        inicio = time.perf_counter()
+        await asyncio.gather(*(
+            _trabalhador(cliente, mistura, random.Random(args.semente + i), restantes, medicoes, contar)
+            for i in range(args.concorrencia)
+        ))
+        duracao = time.perf_counter() - inicio
+        consistencia = None if args.url else await _consistencia()
+    
+    todas = [medicao for lista in medicoes.values() for medicao in lista]
+    return {
+        "ambiente": {
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "banco": db.dialect.name if not args.url else None,
+            "alvo": args.url or "asgi"
+        },
+        "config": {
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "aquecimento": args.aquecimento,
+            "semente": args.semente,
+            "zipf": args.zipf
+        },
+        "duracao_s": round(duracao, 3),
+        "total": _resumo(todas, duracao),
+        "rotas": {rota: _resumo(medicoes[rota], duracao) for rota in sorted(medicoes)},
+        "consistencia": consistencia
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Teste de carga com mistura realista de requisições.")
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=8, help="clientes simultâneos")
+    parser.add_argument("--aquecimento", type=int, default=200, help="requisições descartadas antes de medir")
+    parser.add_argument("--tokens", type=int, default=200, help="usuários logados na mistura")
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument(
+        "--url",
+        help="servidor já em execução, com o mesmo banco e SECRET_KEY (sem contagem de consultas); padrão: app em processo"
+    )
+    parser.add_argument("--saida", help="arquivo JSON de resultado (padrão: stdout)")
+    args = parser.parse_args()
+    
+    resultado = asyncio.run(executar(args))
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False, sort_keys=True)
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            arquivo.write(saida + "\n")
+        total = resultado["total"]
+        print(f"{total['requisicoes']} requisições, {total['rps']} req/s, p50 {total['p50_ms']} ms, p99 {total['p99_ms']} ms -> {args.saida}")
+    else:
+        print(saida)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,42 @@
+import argparse
+import json
+import sys
+
+# Mostra a variação por rota entre dois resultados de benchmarks.carga.
+# Uso (dentro de backend/): python -m benchmarks.comparar antes.json depois.json
+
+def comparar(antes, depois):
+    with open(antes) as arquivo:
+        a = json.load(arquivo)
+    with open(depois) as arquivo:
+        b = json.load(arquivo)
+    
+    def variacao(x, y):
+        if x is None or y is None:
+            return "-"
+        return f"{(y - x) / x * 100:+.1f}%" if x else "-"
+    
+    print(f"{a['ambiente']['commit']} -> {b['ambiente']['commit']}")
+    print(f"{'rota':42} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9} {'consultas':>12}")
+    for rota in ["total"] + sorted(set(a["rotas"]) | set(b["rotas"])):
+        x = a["total"] if rota == "total" else a["rotas"].get(rota)
+        y = b["total"] if rota == "total" else b["rotas"].get(rota)
+        if not x or not y:
+            print(f"{rota:42} só em {'depois' if y else 'antes'}")
+            continue
+        consultas = f"{x['consultas_por_req']} -> {y['consultas_por_req']}" if x["consultas_por_req"] != y["consultas_por_req"] else "="
+        print(
+            f"{rota:42} {variacao(x['p50_ms'], y['p50_ms']):>9} {variacao(x['p95_ms'], y['p95_ms']):>9} "
+            f"{variacao(x['p99_ms'], y['p99_ms']):>9} {variacao(x['rps'], y['rps']):>9} {consultas:>12}"
+        )
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de python -m benchmarks.carga.")
+    parser.add_argument("antes")
+    parser.add_argument("depois")
+    args = parser.parse_args()
+    comparar(args.antes, args.depois)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
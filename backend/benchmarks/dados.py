@@ -0,0 +1,182 @@
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from sqlalchemy import select, update, func, insert, literal, not_
+import main
+from models import db, Base, Usuario, Comentario, Resposta, Curtida, Enquete, Opcoes, Voto, TimelineItem, seguidor_association
+from senhas import calibrar_custo
+from timeline import TIMELINE_LIMITE_FANOUT
+
+# Gera uma base sintética com popularidade enviesada (Zipf): poucos usuários
+# concentram a maior parte dos seguidores, e poucos posts/enquetes a maior
+# parte das curtidas, respostas e votos, como numa rede social real.
+# Uso (dentro de backend/, num banco vazio):
+#   DATABASE_URL=sqlite:///bench.db python -m benchmarks.dados --usuarios 1000 --posts 20000
+
+SENHA = "senha-benchmark"
+LOTE = 5000
+
+PALAVRAS = (
+    "futebol música cinema viagem receita praia café livro série jogo cidade festa trabalho estudo prova "
+    "faculdade show treino corrida academia política eleição tecnologia celular programação python banco "
+    "dados rede social enquete opinião notícia chuva sol calor frio feriado fim de semana amigos família"
+).split()
+
+class Zipf:
+    def __init__(self, itens, expoente, aleatorio):
+        # a ordem de popularidade é sorteada, para o mais popular não ser sempre o id 1
+        self.itens = list(itens)
+        aleatorio.shuffle(self.itens)
+        self.acumulado = list(accumulate(1 / posicao ** expoente for posicao in range(1, len(self.itens) + 1)))
+        self.aleatorio = aleatorio
+    
+    def sortear(self, quantidade=1, aleatorio=None):
+        return (aleatorio or self.aleatorio).choices(self.itens, cum_weights=self.acumulado, k=quantidade)
+
+def _frase(aleatorio, minimo, maximo):
+    return " ".join(aleatorio.choices(PALAVRAS, k=aleatorio.randint(minimo, maximo)))
+
+def _inserir(conexao, tabela, registros):
+    for inicio in range(0, len(registros), LOTE):
+        conexao.execute(insert(tabela), registros[inicio:inicio + LOTE])
+
+def _pares_unicos(quantidade, sortear_a, sortear_b):
+    # sorteia em blocos até juntar `quantidade` pares distintos (ou desistir)
+    pares = set()
+    for _ in range(20):
+        faltam = quantidade - len(pares)
+        if faltam <= 0:
+            break
+        pares.update(zip(sortear_a(faltam), sortear_b(faltam)))
+    return list(pares)[:quantidade]
+
+def gerar(usuarios, posts, curtidas, respostas, seguidores, enquetes, votos, expoente=1.1, semente=42):
+    aleatorio = random.Random(semente)
+    contagens = {}
+    agora = datetime.now().replace(microsecond=0)
+    inicio_periodo = agora - timedelta(days=30)
+    calibrar_custo()
+    senha = main.bcrypt_context.hash(SENHA)
+    
+    Base.metadata.create_all(db)
+    with db.connect() as conexao:
+        if conexao.execute(select(func.count()).select_from(Usuario)).scalar():
+            raise SystemExit("O banco já tem dados; aponte DATABASE_URL para um banco vazio")
+    
+        _inserir(conexao, Usuario.__table__, [
+            {"nome": f"usuario{i}", "email": f"usuario{i}@bench.exemplo.com", "senha": senha,
+             "criado_em": inicio_periodo, "atualizado_em": inicio_periodo}
+            for i in range(usuarios)
+        ])
+        ids_usuarios = conexao.execute(select(Usuario.id).order_by(Usuario.id)).scalars().all()
+        uniforme = lambda k: aleatorio.choices(ids_usuarios, k=k)
+        # quem é seguido e quem publica seguem rankings independentes
+        seguidos = Zipf(ids_usuarios, expoente, aleatorio)
+        autores = Zipf(ids_usuarios, expoente, aleatorio)
+    
+        pares = [(a, b) for a, b in _pares_unicos(seguidores, uniforme, seguidos.sortear) if a != b]
+        _inserir(conexao, seguidor_association, [{"seguidor_id": a, "seguindo_id": b} for a, b in pares])
+        contagens["seguidor"] = len(pares)
+    
+        passo = (agora - inicio_periodo) / max(posts, 1)
+        _inserir(conexao, Comentario.__table__, [
+            {"usuario_id": autor, "titulo": _frase(aleatorio, 2, 5) if aleatorio.random() < 0.6 else None,
+             "conteudo": _frase(aleatorio, 5, 30), "criado_em": inicio_periodo + passo * i,
+             "atualizado_em": inicio_periodo + passo * i}
+            for i, autor in enumerate(autores.sortear(posts))
+        ])
+        ids_posts = conexao.execute(select(Comentario.id).order_by(Comentario.id)).scalars().all()
+        posts_populares = Zipf(ids_posts, expoente, aleatorio)
+    
+        pares = _pares_unicos(curtidas, uniforme, posts_populares.sortear)
+        _inserir(conexao, Curtida.__table__, [{"usuario_id": u, "comentario_id": p} for u, p in pares])
+        contagens["curtidas"] = len(pares)
+    
+        _inserir(conexao, Resposta.__table__, [
+            {"usuario_id": u, "comentario_id": p, "conteudo": _frase(aleatorio, 3, 15)}
+            for u, p in zip(uniforme(respostas), posts_populares.sortear(respostas))
+        ])
+    
+        passo = (agora - inicio_periodo) / max(enquetes, 1)
+        _inserir(conexao, Enquete.__table__, [
+            {"usuario_id": autor, "nome": f"enquete-{i}", "titulo": _frase(aleatorio, 2, 6),
+             "conteudo": _frase(aleatorio, 5, 20), "criado_em": inicio_periodo + passo * i,
+             "atualizado_em": inicio_periodo + passo * i}
+            for i, autor in enumerate(autores.sortear(enquetes))
+        ])
+        ids_enquetes = conexao.execute(select(Enquete.id).order_by(Enquete.id)).scalars().all()
+        _inserir(conexao, Opcoes.__table__, [
+            {"enquete_id": enquete_id, "conteudo": f"opção {n}", "votos": 0}
+            for enquete_id in ids_enquetes for n in range(aleatorio.randint(2, 4))
+        ])
+        opcoes = {}
+        for enquete_id, opcao_id in conexao.execute(select(Opcoes.enquete_id, Opcoes.id)):
+            opcoes.setdefault(enquete_id, []).append(opcao_id)
+    
+        if ids_enquetes:
+            enquetes_populares = Zipf(ids_enquetes, expoente, aleatorio)
+            pares = _pares_unicos(votos, uniforme, enquetes_populares.sortear)
+            _inserir(conexao, Voto.__table__, [
+                {"usuario_id": u, "enquete_id": e, "opcao_id": aleatorio.choice(opcoes[e])} for u, e in pares
+            ])
+            contagens["votos"] = len(pares)
+    
+        _atualizar_contadores(conexao)
+        contagens["timeline"] = _montar_timeline(conexao)
+        conexao.commit()
+    
+    contagens.update(usuarios=len(ids_usuarios), comentarios=len(ids_posts), respostas=respostas, enquetes=len(ids_enquetes))
+    return contagens
+
+def _atualizar_contadores(conexao):
+    conexao.execute(update(Comentario).values(
+        curtidas_count=select(func.count()).where(Curtida.comentario_id == Comentario.id).scalar_subquery(),
+        respostas_count=select(func.count()).where(Resposta.comentario_id == Comentario.id).scalar_subquery()
+    ))
+    conexao.execute(update(Opcoes).values(
+        votos=select(func.count()).where(Voto.opcao_id == Opcoes.id).scalar_subquery()
+    ))
+    seguidores = select(func.count()).where(seguidor_association.c.seguindo_id == Usuario.id).scalar_subquery()
+    conexao.execute(update(Usuario).where(seguidores > TIMELINE_LIMITE_FANOUT).values(popular=True))
+
+# mesma regra do distribuir_item: itens de autores populares não são copiados
+def _montar_timeline(conexao):
+    colunas = ["usuario_id", "autor_id", "tipo", "item_id", "criado_em"]
+    for modelo, tipo in ((Comentario, "comentario"), (Enquete, "enquete")):
+        nao_popular = not_(select(Usuario.popular).where(Usuario.id == modelo.usuario_id).scalar_subquery())
+        conexao.execute(insert(TimelineItem).from_select(colunas, select(
+            seguidor_association.c.seguidor_id, modelo.usuario_id, literal(tipo), modelo.id, modelo.criado_em
+        ).join(seguidor_association, seguidor_association.c.seguindo_id == modelo.usuario_id).where(nao_popular)))
+        conexao.execute(insert(TimelineItem).from_select(colunas, select(
+            modelo.usuario_id, modelo.usuario_id, literal(tipo), modelo.id, modelo.criado_em
+        )))
+    return conexao.execute(select(func.count()).select_from(TimelineItem)).scalar()
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Popula um banco vazio com dados sintéticos para os benchmarks.")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--curtidas", type=int, default=100000)
+    parser.add_argument("--respostas", type=int, default=20000)
+    parser.add_argument("--seguidores", type=int, default=20000, help="relações de seguir")
+    parser.add_argument("--enquetes", type=int, default=500)
+    parser.add_argument("--votos", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da distribuição de popularidade")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    
+    inicio = time.perf_counter()
+    contagens = gerar(
+        args.usuarios, args.posts, args.curtidas, args.respostas, args.seguidores,
+        args.enquetes, args.votos, args.zipf, args.semente
+    )
+    for tabela, linhas in contagens.items():
+        print(f"{tabela}: {linhas}")
+    print(f"gerado em {time.perf_counter() - inicio:.1f}s (senha de todos os usuários: {SENHA})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,93 @@
+import argparse
+import gzip
+import timeit
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from serializacao import RespostaJSON
+from schemas_rede import PaginaPosts, PostDetalhes, ListaSeguidores, EnqueteCompleta
+
+# Compara, por rota, o caminho padrão do FastAPI (validação do response_model
+# + conversão para JSON + json.dumps) com o RespostaJSON devolvido direto.
+# Uso (dentro de backend/): python -m benchmarks.serializacao
+
+AGORA = datetime(2026, 1, 1, 12, 0, 0)
+
+def _post(i):
+    return {
+        "id": i,
+        "usuario": f"usuario{i % 50}",
+        "usuario_id": i % 50,
+        "titulo": f"Título do post {i}" if i % 3 else None,
+        "conteudo": "Conteúdo de exemplo com acentuação e um pouco de texto. " * 4,
+        "midia": None,
+        "curtidas": i * 7 % 300,
+        "respostas": i % 40,
+        "criado_em": AGORA - timedelta(minutes=i)
+    }
+
+def payloads(tamanho_feed, seguidores, respostas):
+    opcoes = [{"id": i, "conteudo": f"Opção {i}", "votos": i * 13} for i in range(6)]
+    return {
+        "GET /social/posts/listar": (PaginaPosts, {
+            "posts": [_post(i) for i in range(tamanho_feed)],
+            "next_cursor": "MjAyNi0wMS0wMVQxMjowMDowMHwx"
+        }),
+        "GET /social/posts/{id}": (PostDetalhes, {
+            **{k: v for k, v in _post(1).items() if k not in ("usuario_id", "respostas")},
+            "respostas": [
+                {"id": i, "usuario": f"usuario{i}", "conteudo": "Resposta curta.", "criado_em": AGORA}
+                for i in range(respostas)
+            ]
+        }),
+        "GET /social/usuarios/{id}/seguidores": (ListaSeguidores, {
+            "total": seguidores,
+            "seguidores": [
+                {"id": i, "nome": f"usuario{i}"} for i in range(seguidores)
+            ]
+        }),
+        "GET /social/enquetes/{id}": (EnqueteCompleta, {
+            "id": 1, "usuario": "usuario1", "usuario_id": 1, "nome": "enquete-1",
+            "titulo": "Qual opção?", "conteudo": "Escolha uma.", "midia": None,
+            "opcoes": opcoes, "curtidas": 10, "criado_em": AGORA
+        })
+    }
+
+def caminho_padrao(adaptador, conteudo):
+    validado = adaptador.validate_python(conteudo)
+    return JSONResponse(adaptador.dump_python(validado, mode="json")).body
+
+def sem_modelo(conteudo):
+    return JSONResponse(jsonable_encoder(conteudo)).body
+
+def rapido(conteudo):
+    return RespostaJSON(conteudo).body
+
+def medir(funcao, repeticoes):
+    vezes = timeit.repeat(funcao, number=repeticoes, repeat=5)
+    return min(vezes) / repeticoes * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo de serialização por rota, antes e depois")
+    parser.add_argument("--feed", type=int, default=100, help="posts por página do feed")
+    parser.add_argument("--seguidores", type=int, default=5000)
+    parser.add_argument("--respostas", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rota':40} {'modelo (us)':>12} {'encoder (us)':>13} {'rápido (us)':>12} {'ganho':>7} {'bytes':>9} {'gzip':>8}")
+    for rota, (modelo, conteudo) in payloads(args.feed, args.seguidores, args.respostas).items():
+        adaptador = TypeAdapter(modelo)
+        assert caminho_padrao(adaptador, conteudo).decode() and rapido(conteudo)
+        antes = medir(lambda: caminho_padrao(adaptador, conteudo), args.repeticoes)
+        encoder = medir(lambda: sem_modelo(conteudo), args.repeticoes)
+        depois = medir(lambda: rapido(conteudo), args.repeticoes)
+        corpo = rapido(conteudo)
+        print(
+            f"{rota:40} {antes:12.1f} {encoder:13.1f} {depois:12.1f} {antes / depois:6.1f}x "
+            f"{len(corpo):9d} {len(gzip.compress(corpo)):8d}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+import os
+from fastapi.encoders import jsonable_encoder
+from eventos import hub
+
+BROKER_URL = os.getenv("BROKER_URL")
+BROKER_CANAL = os.getenv("BROKER_CANAL", "rede-social:eventos")
+
+logger = logging.getLogger(__name__)
+
+class BrokerLocal:
+    async def iniciar(self):
+        pass
+
+    async def parar(self):
+        pass
+
+    async def publicar(self, evento):
+        hub.entregar(evento)
+
+# Com vários workers, cada processo tem o seu hub; o Redis repassa os eventos
+# publicados em qualquer worker para todos (inclusive o que publicou).
+class BrokerRedis:
+    def __init__(self, url, canal=BROKER_CANAL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("BROKER_URL configurado, mas o pacote redis não está instalado")
+        self._redis = redis.from_url(url)
+        self._canal = canal
+        self._tarefa = None
+
+    async def iniciar(self):
+        self._tarefa = asyncio.create_task(self._receber())
+
+    async def _receber(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(self._canal)
+                async for mensagem in pubsub.listen():
+                    if mensagem["type"] == "message":
+                        hub.entregar(json.loads(mensagem["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Conexão com o broker perdida, reconectando")
+                await asyncio.sleep(1)
+
+    async def parar(self):
+        if self._tarefa:
+            self._tarefa.cancel()
+        await self._redis.aclose()
+
+    async def publicar(self, evento):
+        await self._redis.publish(self._canal, json.dumps(evento))
+
+broker = BrokerRedis(BROKER_URL) if BROKER_URL else BrokerLocal()
+_loop = None
+
+async def iniciar():
+    global _loop
+    _loop = asyncio.get_running_loop()
+    await broker.iniciar()
+
+async def publicar(tipo, **dados):
+    evento = jsonable_encoder({"tipo": tipo, **dados})
+    try:
+        await broker.publicar(evento)
+    except Exception:
+        # eventos são só avisos para os clientes; uma falha aqui não pode
+        # desfazer a operação que já foi gravada
+        logger.exception("Falha ao publicar evento %s", tipo)
+
+# Para código síncrono que não pode dar await (eventos do ORM): no event loop
+# a publicação vira uma tarefa; numa thread do threadpool é entregue ao loop.
+_pendentes = set()
+
+def publicar_sem_esperar(tipo, **dados):
+    try:
+        tarefa = asyncio.get_running_loop().create_task(publicar(tipo, **dados))
+        _pendentes.add(tarefa)
+        tarefa.add_done_callback(_pendentes.discard)
+    except RuntimeError:
+        if _loop is not None and not _loop.is_closed():
+            asyncio.run_coroutine_threadsafe(publicar(tipo, **dados), _loop)
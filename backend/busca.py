@@ -0,0 +1,171 @@
+import heapq
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from sqlalchemy import select
+from models import SessaoAsync, Usuario, Comentario, Enquete
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PESO_TITULO = 2
+
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "em", "eu", "ela", "ele",
+    "entre", "essa", "esse", "esta", "este", "foi", "ha", "isso", "ja", "mais", "mas", "me", "meu", "minha",
+    "na", "nas", "nao", "no", "nos", "o", "os", "ou", "para", "pela", "pelo", "por", "pra", "que", "se",
+    "sao", "sem", "ser", "seu", "sua", "tem", "um", "uma", "uns", "umas", "voce"
+}
+
+# sufixos testados em ordem; o primeiro que casar é trocado pela substituição
+SUFIXOS = [
+    ("amentos", "a"), ("imentos", "i"), ("amento", "a"), ("imento", "i"),
+    ("mente", ""), ("idades", "idade"), ("coes", "cao"), ("soes", "sao"),
+    ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+    ("ns", "m"), ("res", "r"), ("zes", "z"), ("les", "l"), ("ses", "s"), ("s", "")
+]
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", (texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+# plurais de -ão podem deixar um radical curto (ações -> ac-), que ainda
+# precisa cair no mesmo termo do singular (ação)
+RADICAL_MINIMO = {"coes": 1, "soes": 1, "oes": 1}
+
+def radical(palavra):
+    if len(palavra) <= 3:
+        return palavra
+    for sufixo, troca in SUFIXOS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= RADICAL_MINIMO.get(sufixo, 3):
+            palavra = palavra[:-len(sufixo)] + troca
+            break
+    # feminino/masculino caem no mesmo termo (curtida/curtido, nova/novo)
+    if len(palavra) > 4 and palavra[-1] in "ao":
+        palavra = palavra[:-1]
+    return palavra
+
+def termos(texto):
+    return [radical(p) for p in re.findall(r"[a-z0-9]+", normalizar(texto)) if p not in STOPWORDS]
+
+class IndiceBusca:
+    def __init__(self):
+        self._postings = {}
+        self._documentos = {}
+        self._tamanho_total = 0
+        self._total_postings = 0
+        self.consultas = 0
+        self.tempo_total = 0.0
+        self.tempo_max = 0.0
+
+    def adicionar(self, tipo, id, titulo, corpo):
+        chave = (tipo, id)
+        self.remover(tipo, id)
+        frequencias = Counter(termos(corpo))
+        for termo in termos(titulo):
+            frequencias[termo] += PESO_TITULO
+        if not frequencias:
+            return
+        tamanho = sum(frequencias.values())
+        self._documentos[chave] = (frequencias, tamanho)
+        self._tamanho_total += tamanho
+        self._total_postings += len(frequencias)
+        for termo, frequencia in frequencias.items():
+            self._postings.setdefault(termo, {})[chave] = frequencia
+
+    def remover(self, tipo, id):
+        chave = (tipo, id)
+        documento = self._documentos.pop(chave, None)
+        if not documento:
+            return
+        frequencias, tamanho = documento
+        self._tamanho_total -= tamanho
+        self._total_postings -= len(frequencias)
+        for termo in frequencias:
+            postings = self._postings[termo]
+            del postings[chave]
+            if not postings:
+                del self._postings[termo]
+
+    # devolve os `quantidade` melhores resultados, o total encontrado e o tempo gasto
+    def buscar(self, consulta, quantidade, tipos=None):
+        inicio = time.perf_counter()
+        chaves = list(dict.fromkeys(termos(consulta)))
+        melhores, total = [], 0
+        if chaves and all(termo in self._postings for termo in chaves):
+            # todos os termos precisam aparecer; começa pela lista mais curta
+            listas = sorted((self._postings[termo] for termo in chaves), key=len)
+            candidatos = set(listas[0])
+            for postings in listas[1:]:
+                candidatos.intersection_update(postings)
+            if tipos:
+                candidatos = {chave for chave in candidatos if chave[0] in tipos}
+
+            total_documentos = len(self._documentos)
+            inclinacao = BM25_K1 * BM25_B * total_documentos / self._tamanho_total
+            normas = {
+                chave: BM25_K1 * (1 - BM25_B) + inclinacao * self._documentos[chave][1]
+                for chave in candidatos
+            }
+            pontuacao = dict.fromkeys(candidatos, 0.0)
+            for termo in chaves:
+                postings = self._postings[termo]
+                idf = math.log(1 + (total_documentos - len(postings) + 0.5) / (len(postings) + 0.5))
+                peso = idf * (BM25_K1 + 1)
+                for chave, norma in normas.items():
+                    frequencia = postings[chave]
+                    pontuacao[chave] += peso * frequencia / (frequencia + norma)
+            total = len(pontuacao)
+            # desempate pelo id mais alto (mais recente)
+            melhores = heapq.nlargest(quantidade, pontuacao.items(), key=lambda item: (item[1], item[0][1]))
+
+        tempo = time.perf_counter() - inicio
+        self.consultas += 1
+        self.tempo_total += tempo
+        self.tempo_max = max(self.tempo_max, tempo)
+        return melhores, total, tempo
+
+    def atualizar(self, evento):
+        tipo = evento["tipo"]
+        if tipo == "post_criado":
+            self.adicionar("post", evento["post_id"], evento.get("titulo"), evento.get("conteudo"))
+        elif tipo == "post_removido":
+            self.remover("post", evento["post_id"])
+        elif tipo == "enquete_criada":
+            self.adicionar(
+                "enquete", evento["enquete_id"],
+                f"{evento.get('nome') or ''} {evento.get('titulo') or ''}", evento.get("conteudo")
+            )
+        elif tipo == "enquete_removida":
+            self.remover("enquete", evento["enquete_id"])
+        elif tipo == "usuario_criado":
+            self.adicionar("usuario", evento["usuario_id"], evento.get("nome"), "")
+
+    async def carregar(self, tamanho_lote=1000):
+        async with SessaoAsync() as session:
+            for consulta, tipo in (
+                (select(Comentario.id, Comentario.titulo, Comentario.conteudo), "post"),
+                (select(Enquete.id, Enquete.nome, Enquete.titulo, Enquete.conteudo), "enquete"),
+                (select(Usuario.id, Usuario.nome), "usuario"),
+            ):
+                linhas = await session.stream(consulta.execution_options(yield_per=tamanho_lote))
+                async for linha in linhas:
+                    if tipo == "post":
+                        self.adicionar(tipo, linha.id, linha.titulo, linha.conteudo)
+                    elif tipo == "enquete":
+                        self.adicionar(tipo, linha.id, f"{linha.nome} {linha.titulo or ''}", linha.conteudo)
+                    else:
+                        self.adicionar(tipo, linha.id, linha.nome, "")
+
+    def estatisticas(self):
+        return {
+            "documentos": len(self._documentos),
+            "termos": len(self._postings),
+            "postings": self._total_postings,
+            "consultas": self.consultas,
+            "tempo_medio_ms": round(self.tempo_total / self.consultas * 1000, 3) if self.consultas else 0,
+            "tempo_max_ms": round(self.tempo_max * 1000, 3)
+        }
+
+indice = IndiceBusca()
@@ -0,0 +1,125 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, joinedload
+from models import Enquete
+from schemas_rede import EnqueteCache
+
+CACHE_ENQUETES_TAMANHO = int(os.getenv("CACHE_ENQUETES_TAMANHO", "5000"))
+CACHE_ENQUETES_TTL = int(os.getenv("CACHE_ENQUETES_TTL", "300"))
+
+# Cópias das enquetes com opções e votos, atualizadas pelos eventos "voto" e
+# "enquete_removida" que o broker entrega a todos os workers. Cada evento de
+# voto traz a versão nova da enquete: se faltar uma versão no meio (evento
+# perdido), a cópia é descartada. O TTL só limita quanto tempo uma cópia
+# pode ficar errada se o broker perder eventos sem que venha outro voto.
+# A maior versão vista por enquete fica guardada mesmo sem cópia no cache:
+# uma leitura do banco feita antes de um voto recém-aplicado não entra.
+class CacheEnquetes:
+    def __init__(self, tamanho, ttl):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self.recusadas = 0
+        self._entradas = OrderedDict()
+        self._versoes = OrderedDict()
+    
+    def obter(self, enquete_id):
+        entrada = self._entradas.get(enquete_id)
+        if entrada and entrada[0] > time.time():
+            self._entradas.move_to_end(enquete_id)
+            self.acertos += 1
+            return entrada[1]
+        if entrada:
+            del self._entradas[enquete_id]
+        self.falhas += 1
+        return None
+    
+    def guardar(self, enquete):
+        # uma leitura lenta do banco não substitui uma versão já mais nova
+        if self._versoes.get(enquete.id, 0) > enquete.versao:
+            self.recusadas += 1
+            return
+        self._ver(enquete.id, enquete.versao)
+        self._entradas[enquete.id] = (time.time() + self.ttl, enquete)
+        self._entradas.move_to_end(enquete.id)
+        while len(self._entradas) > self.tamanho:
+            self._entradas.popitem(last=False)
+    
+    def invalidar(self, enquete_id):
+        self._entradas.pop(enquete_id, None)
+    
+    # guarda mais enquetes do que as cópias, mas também com limite
+    def _ver(self, enquete_id, versao):
+        self._versoes[enquete_id] = max(versao, self._versoes.pop(enquete_id, 0))
+        while len(self._versoes) > self.tamanho * 4:
+            self._versoes.popitem(last=False)
+    
+    def aplicar_voto(self, enquete_id, opcao_id, delta, versao, atualizado_em):
+        self._ver(enquete_id, versao)
+        entrada = self._entradas.get(enquete_id)
+        if not entrada:
+            return
+        enquete = entrada[1]
+        if versao <= enquete.versao:
+            return
+        if versao != enquete.versao + 1:
+            self.invalidar(enquete_id)
+            return
+        for opcao in enquete.opcoes:
+            if opcao.id == opcao_id:
+                opcao.votos += delta
+                break
+        else:
+            self.invalidar(enquete_id)
+            return
+        enquete.versao = versao
+        enquete.atualizado_em = atualizado_em
+    
+    def atualizar(self, evento):
+        if evento["tipo"] == "voto" and "versao" in evento:
+            atualizado_em = evento.get("atualizado_em")
+            if isinstance(atualizado_em, str):
+                atualizado_em = datetime.fromisoformat(atualizado_em)
+            self.aplicar_voto(
+                evento["enquete_id"], evento["opcao_id"], evento.get("delta", 1), evento["versao"], atualizado_em
+            )
+        elif evento["tipo"] == "enquete_removida":
+            self.invalidar(evento["enquete_id"])
+    
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            "tamanho": len(self._entradas),
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "recusadas": self.recusadas,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0
+        }
+
+cache_enquetes = CacheEnquetes(CACHE_ENQUETES_TAMANHO, CACHE_ENQUETES_TTL)
+
+# devolve {id: EnqueteCache} só com as enquetes que existem; as que não estão
+# no cache vêm do banco numa consulta só
+async def ler_enquetes(session, ids):
+    encontradas, faltando = {}, []
+    for enquete_id in ids:
+        enquete = cache_enquetes.obter(enquete_id)
+        if enquete:
+            encontradas[enquete_id] = enquete
+        else:
+            faltando.append(enquete_id)
+    if faltando:
+        for enquete in (await session.execute(
+            select(Enquete).options(joinedload(Enquete.usuario), selectinload(Enquete.opcoes)).where(Enquete.id.in_(faltando))
+        )).scalars():
+            copia = EnqueteCache.model_validate(enquete)
+            cache_enquetes.guardar(copia)
+            encontradas[enquete.id] = copia
+    return encontradas
+
+async def ler_enquete(session, enquete_id):
+    return (await ler_enquetes(session, [enquete_id])).get(enquete_id)
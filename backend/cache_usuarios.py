@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from models import Usuario
+from broker import publicar_sem_esperar
+
+CACHE_USUARIOS_TAMANHO = int(os.getenv("CACHE_USUARIOS_TAMANHO", "10000"))
+CACHE_USUARIOS_TTL = int(os.getenv("CACHE_USUARIOS_TTL", "60"))
+
+# Cada worker do uvicorn mantém o próprio cache. Alterar ou remover um usuário
+# publica "usuario_alterado" no broker depois do commit, e todos os workers
+# descartam as entradas dele; o TTL só cobre eventos perdidos.
+class CacheUsuarios:
+    def __init__(self, tamanho, ttl):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self._entradas = OrderedDict()
+        self._por_usuario = {}
+        self._trava = threading.Lock()
+
+    # contar=False é para quem só consulta (limites por usuário) e não deve
+    # entrar nas estatísticas de acerto da autenticação
+    def obter(self, token, contar=True):
+        chave = _chave(token)
+        agora = time.time()
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] > agora:
+                self._entradas.move_to_end(chave)
+                self.acertos += contar
+                return entrada[1]
+            if entrada:
+                self._remover(chave)
+            self.falhas += contar
+            return None
+
+    def guardar(self, token, exp, usuario):
+        chave = _chave(token)
+        expira_em = min(time.time() + self.ttl, exp)
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (expira_em, usuario)
+            self._por_usuario.setdefault(usuario.id, set()).add(chave)
+            while len(self._entradas) > self.tamanho:
+                self._remover(next(iter(self._entradas)))
+
+    def invalidar_usuario(self, usuario_id):
+        with self._trava:
+            for chave in list(self._por_usuario.get(usuario_id, ())):
+                self._remover(chave)
+
+    def atualizar(self, evento):
+        if evento["tipo"] == "usuario_alterado":
+            self.invalidar_usuario(evento["alvo_id"])
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self._por_usuario.clear()
+
+    def estatisticas(self):
+        return {
+            "tamanho": len(self._entradas),
+            "acertos": self.acertos,
+            "falhas": self.falhas
+        }
+
+    def _remover(self, chave):
+        _, usuario = self._entradas.pop(chave)
+        chaves = self._por_usuario.get(usuario.id)
+        if chaves is not None:
+            chaves.discard(chave)
+            if not chaves:
+                del self._por_usuario[usuario.id]
+
+def _chave(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+cache_usuarios = CacheUsuarios(CACHE_USUARIOS_TAMANHO, CACHE_USUARIOS_TTL)
+
+def _marcar(usuario):
+    cache_usuarios.invalidar_usuario(usuario.id)
+    session = object_session(usuario)
+    if session is not None:
+        session.info.setdefault("usuarios_alterados", set()).add(usuario.id)
+
+@event.listens_for(Usuario, "after_update")
+def _invalidar_alterado(mapper, connection, usuario):
+    # seguir/deixar de seguir também marcam o usuário como sujo; só colunas importam aqui
+    estado = inspect(usuario)
+    if any(estado.attrs[coluna.key].history.has_changes() for coluna in mapper.column_attrs):
+        _marcar(usuario)
+
+@event.listens_for(Usuario, "after_delete")
+def _invalidar_removido(mapper, connection, usuario):
+    _marcar(usuario)
+
+# só depois do commit os outros workers podem descartar a cópia: antes disso
+# eles leriam de novo a versão antiga do banco
+@event.listens_for(Session, "after_commit")
+def _avisar_workers(session):
+    for usuario_id in session.info.pop("usuarios_alterados", ()):
+        publicar_sem_esperar("usuario_alterado", alvo_id=usuario_id, interno=True)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marcados(session):
+    session.info.pop("usuarios_alterados", None)
@@ -0,0 +1,83 @@
+import argparse
+from sqlalchemy import select, update, func
+from models import SessaoLocal, Comentario, Enquete, Curtida, Resposta
+
+# (modelo, coluna do contador, coluna de origem na tabela relacionada)
+CONTADORES = [
+    (Comentario, "curtidas_count", Curtida.comentario_id),
+    (Comentario, "respostas_count", Resposta.comentario_id),
+    (Enquete, "curtidas_count", Curtida.enquete_id),
+]
+
+# Alterar um contador também avança a versão usada no ETag do item. O UPDATE
+# vem antes do insert/delete da linha filha: a chave estrangeira da filha
+# trava a linha do pai em modo compartilhado, e pedir depois o lock exclusivo
+# do pai faria duas transações simultâneas se bloquearem (deadlock no InnoDB).
+# O rowcount devolvido serve de verificação de que o item existe.
+async def incrementar(session, modelo, coluna, id, delta=1):
+    contador = getattr(modelo, coluna)
+    return await session.execute(
+        update(modelo).where(modelo.id == id).values({contador: contador + delta, modelo.versao: modelo.versao + 1})
+    )
+
+async def incrementar_varios(session, modelo, coluna, ids, delta=1):
+    contador = getattr(modelo, coluna)
+    await session.execute(
+        update(modelo).where(modelo.id.in_(ids)).values({contador: contador + delta, modelo.versao: modelo.versao + 1})
+    )
+
+def _contagem_real(modelo, origem):
+    return (
+        select(func.count())
+        .where(origem == modelo.id)
+        .correlate(modelo)
+        .scalar_subquery()
+    )
+
+def encontrar_divergencias(session, tamanho_lote=10000):
+    divergencias = []
+    for modelo, coluna, origem in CONTADORES:
+        contador = getattr(modelo, coluna)
+        real = _contagem_real(modelo, origem)
+        ultimo_id = 0
+        while True:
+            ids = [
+                linha.id
+                for linha in session.query(modelo.id)
+                .filter(modelo.id > ultimo_id)
+                .order_by(modelo.id)
+                .limit(tamanho_lote)
+            ]
+            if not ids:
+                break
+            for linha in session.query(modelo.id, contador.label("armazenado"), real.label("real")).filter(
+                modelo.id.in_(ids), contador != real
+            ):
+                divergencias.append((modelo, coluna, origem, linha.id, linha.armazenado, linha.real))
+            ultimo_id = ids[-1]
+    return divergencias
+
+def corrigir_divergencias(session, divergencias):
+    for modelo, coluna, origem, id, _, _ in divergencias:
+        session.query(modelo).filter(modelo.id == id).update(
+            {getattr(modelo, coluna): _contagem_real(modelo, origem)},
+            synchronize_session=False
+        )
+    session.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica e corrige os contadores de curtidas e respostas")
+    parser.add_argument("--corrigir", action="store_true", help="grava os valores recalculados")
+    args = parser.parse_args()
+
+    session = SessaoLocal()
+    try:
+        divergencias = encontrar_divergencias(session)
+        for modelo, coluna, _, id, armazenado, real in divergencias:
+            print(f"{modelo.__tablename__}.{coluna} id={id}: armazenado={armazenado} real={real}")
+        print(f"{len(divergencias)} divergência(s) encontrada(s)")
+        if divergencias and args.corrigir:
+            corrigir_divergencias(session, divergencias)
+            print("Contadores corrigidos")
+    finally:
+        session.close()
@@ -1,22 +1,28 @@
-from sqlalchemy.orm import sessionmaker
-from models import db, Usuario
+from models import SessaoLocal, SessaoAsync, Usuario
 from fastapi import Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from main import SECRET_KEY, ALGORITHM, bearer_scheme
+from cache_usuarios import cache_usuarios
+from schemas_rede import UsuarioPublico
 
 def pegar_sessao():
+    session = SessaoLocal()
     try:
-        Session = sessionmaker(bind=db)
-        session = Session()
         yield session
     finally:
         session.close()
         
 def verificar_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), session: Session = Depends(pegar_sessao)):
+    token = credentials.credentials
+    usuario = cache_usuarios.obter(token)
+    if usuario:
+        return usuario
+    
     try:
-        token = credentials.credentials
         dic_info = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         id_usuario = int(dic_info.get("sub"))
         
@@ -26,4 +32,32 @@ def verificar_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_s
     usuario = session.query(Usuario).filter(Usuario.id == id_usuario).first()
     if not usuario:
         raise HTTPException(status_code=401, detail="Acesso Negado")
+    
+    usuario = UsuarioPublico.model_validate(usuario)
+    cache_usuarios.guardar(token, dic_info["exp"], usuario)
+    return usuario
+
+async def pegar_sessao_async():
+    async with SessaoAsync() as session:
+        yield session
+
+async def verificar_token_async(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), session: AsyncSession = Depends(pegar_sessao_async)):
+    token = credentials.credentials
+    usuario = cache_usuarios.obter(token)
+    if usuario:
+        return usuario
+    
+    try:
+        dic_info = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        id_usuario = int(dic_info.get("sub"))
+        
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Acesso Negado, verifique a validade do token")
+    
+    usuario = (await session.execute(select(Usuario).where(Usuario.id == id_usuario))).scalar_one_or_none()
+    if not usuario:
+        raise HTTPException(status_code=401, detail="Acesso Negado")
+    
+    usuario = UsuarioPublico.model_validate(usuario)
+    cache_usuarios.guardar(token, dic_info["exp"], usuario)
     return usuario
\ No newline at end of file
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+
+EVENTOS_FILA_MAX = int(os.getenv("EVENTOS_FILA_MAX", "100"))
+EVENTOS_PING_S = int(os.getenv("EVENTOS_PING_S", "15"))
+
+class Assinatura:
+    def __init__(self, posts=(), enquetes=(), usuarios=()):
+        self.fila = asyncio.Queue(maxsize=EVENTOS_FILA_MAX)
+        self.posts = set(posts)
+        self.enquetes = set(enquetes)
+        self.usuarios = set(usuarios)
+
+    def interessa(self, evento):
+        if not (self.posts or self.enquetes or self.usuarios):
+            return True
+        return (
+            evento.get("post_id") in self.posts
+            or evento.get("enquete_id") in self.enquetes
+            or evento.get("usuario_id") in self.usuarios
+        )
+
+class HubEventos:
+    def __init__(self):
+        self._assinaturas = set()
+        self._ouvintes = []
+        self.entregues = 0
+        self.descartados = 0
+
+    def assinar(self, posts=(), enquetes=(), usuarios=()):
+        assinatura = Assinatura(posts, enquetes, usuarios)
+        self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        self._assinaturas.discard(assinatura)
+
+    # ouvintes são chamados no próprio event loop, para cada evento recebido
+    def ouvir(self, funcao):
+        self._ouvintes.append(funcao)
+
+    # eventos internos (invalidação de caches) só vão para os ouvintes
+    def entregar(self, evento):
+        for funcao in self._ouvintes:
+            funcao(evento)
+        if evento.get("interno"):
+            return
+        for assinatura in list(self._assinaturas):
+            if not assinatura.interessa(evento):
+                continue
+            try:
+                assinatura.fila.put_nowait(evento)
+                self.entregues += 1
+            except asyncio.QueueFull:
+                # consumidor lento: a conexão é encerrada e o EventSource do
+                # navegador reconecta, em vez de acumular eventos na memória
+                self.descartados += 1
+                self.cancelar(assinatura)
+                while not assinatura.fila.empty():
+                    assinatura.fila.get_nowait()
+                assinatura.fila.put_nowait(None)
+
+    def estatisticas(self):
+        return {
+            "assinantes": len(self._assinaturas),
+            "entregues": self.entregues,
+            "descartados": self.descartados
+        }
+
+hub = HubEventos()
+
+async def transmitir(assinatura):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), EVENTOS_PING_S)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is None:
+                break
+            yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+    finally:
+        hub.cancelar(assinatura)
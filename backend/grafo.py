@@ -0,0 +1,112 @@
+import heapq
+import os
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain, islice
+from sqlalchemy import select
+from models import SessaoAsync, seguidor_association
+
+GRAFO_MAX_ARESTAS = int(os.getenv("GRAFO_MAX_ARESTAS", "200000"))
+GRAFO_POPULARES_TTL = int(os.getenv("GRAFO_POPULARES_TTL", "60"))
+
+def _inserir(lista, valor):
+    posicao = bisect_left(lista, valor)
+    if posicao == len(lista) or lista[posicao] != valor:
+        lista.insert(posicao, valor)
+
+def _remover(lista, valor):
+    posicao = bisect_left(lista, valor)
+    if posicao < len(lista) and lista[posicao] == valor:
+        del lista[posicao]
+
+# Cada usuário guarda quem segue e quem o segue em arrays ordenados de int32
+# (4 bytes por aresta em cada direção), em vez de objetos ORM.
+class GrafoSeguidores:
+    def __init__(self):
+        self._seguindo = {}
+        self._seguidores = {}
+        self._populares = ([], 0.0)
+
+    def seguindo(self, usuario_id):
+        return self._seguindo.get(usuario_id, ())
+
+    def seguidores(self, usuario_id):
+        return self._seguidores.get(usuario_id, ())
+
+    def segue(self, seguidor_id, seguindo_id):
+        lista = self.seguindo(seguidor_id)
+        posicao = bisect_left(lista, seguindo_id)
+        return posicao < len(lista) and lista[posicao] == seguindo_id
+
+    def adicionar(self, seguidor_id, seguindo_id):
+        _inserir(self._seguindo.setdefault(seguidor_id, array("i")), seguindo_id)
+        _inserir(self._seguidores.setdefault(seguindo_id, array("i")), seguidor_id)
+
+    def remover(self, seguidor_id, seguindo_id):
+        _remover(self._seguindo.get(seguidor_id, []), seguindo_id)
+        _remover(self._seguidores.get(seguindo_id, []), seguidor_id)
+
+    def atualizar(self, evento):
+        if evento["tipo"] == "seguiu":
+            self.adicionar(evento["usuario_id"], evento["alvo_id"])
+        elif evento["tipo"] == "deixou_de_seguir":
+            self.remover(evento["usuario_id"], evento["alvo_id"])
+
+    async def carregar(self, tamanho_lote=10000):
+        seguindo, seguidores = {}, {}
+        async with SessaoAsync() as session:
+            linhas = await session.stream(
+                select(seguidor_association.c.seguidor_id, seguidor_association.c.seguindo_id)
+                .execution_options(yield_per=tamanho_lote)
+            )
+            async for seguidor_id, seguindo_id in linhas:
+                seguindo.setdefault(seguidor_id, []).append(seguindo_id)
+                seguidores.setdefault(seguindo_id, []).append(seguidor_id)
+        self._seguindo = {id: array("i", sorted(ids)) for id, ids in seguindo.items()}
+        self._seguidores = {id: array("i", sorted(ids)) for id, ids in seguidores.items()}
+
+    def em_comum(self, usuario_id, outro_id):
+        # quem usuario_id segue e também segue outro_id
+        a, b = self.seguindo(usuario_id), self.seguidores(outro_id)
+        if len(a) > len(b):
+            a, b = b, a
+        return sorted(set(a).intersection(b))
+
+    def sugestoes(self, usuario_id, limit=10):
+        inicio = time.perf_counter()
+        seguindo = self.seguindo(usuario_id)
+        # amigos de amigos, limitados a GRAFO_MAX_ARESTAS para que usuários que
+        # seguem muita gente não deixem a consulta lenta
+        contagem = Counter(islice(chain.from_iterable(self.seguindo(id) for id in seguindo), GRAFO_MAX_ARESTAS))
+        contagem.pop(usuario_id, None)
+        for id in seguindo:
+            contagem.pop(id, None)
+        sugestoes = heapq.nlargest(limit, contagem.items(), key=lambda item: (item[1], -item[0]))
+
+        if len(sugestoes) < limit:
+            ja_sugeridos = {id for id, _ in sugestoes}
+            for id in self._mais_seguidos(limit + len(seguindo) + 1):
+                if len(sugestoes) == limit:
+                    break
+                if id != usuario_id and id not in ja_sugeridos and not self.segue(usuario_id, id):
+                    sugestoes.append((id, 0))
+        return sugestoes, time.perf_counter() - inicio
+
+    def _mais_seguidos(self, quantidade):
+        populares, calculado_em = self._populares
+        if len(populares) < quantidade or time.monotonic() - calculado_em > GRAFO_POPULARES_TTL:
+            populares = heapq.nlargest(quantidade, self._seguidores, key=lambda id: len(self._seguidores[id]))
+            self._populares = (populares, time.monotonic())
+        return populares
+
+    def estatisticas(self):
+        arestas = sum(len(ids) for ids in self._seguindo.values())
+        return {
+            "usuarios": len(self._seguindo.keys() | self._seguidores.keys()),
+            "arestas": arestas,
+            "bytes": arestas * 2 * array("i").itemsize
+        }
+
+grafo = GrafoSeguidores()
@@ -0,0 +1,40 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Response
+from sqlalchemy import update, func
+
+# As datas do banco são gravadas sem fuso (CURRENT_TIMESTAMP/NOW() do
+# servidor), e são tratadas como UTC no Last-Modified.
+def _cabecalhos(tipo, id, versao, atualizado_em):
+    cabecalhos = {"ETag": f'W/"{tipo}-{id}-{versao}"', "Cache-Control": "no-cache"}
+    if atualizado_em:
+        cabecalhos["Last-Modified"] = format_datetime(atualizado_em.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+    return cabecalhos
+
+def _nao_modificado(request, cabecalhos):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+        return "*" in etags or cabecalhos["ETag"].removeprefix("W/") in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in cabecalhos:
+        try:
+            return parsedate_to_datetime(cabecalhos["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+# devolve um 304 se o cliente já tem a versão atual; senão coloca
+# ETag/Last-Modified na resposta e devolve None
+def condicional(request, response, tipo, id, linha):
+    cabecalhos = _cabecalhos(tipo, id, linha.versao, linha.atualizado_em)
+    if _nao_modificado(request, cabecalhos):
+        return Response(status_code=304, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+    return None
+
+async def nova_versao(session, modelo, ids):
+    return await session.execute(
+        update(modelo).where(modelo.id.in_(ids)).values(versao=modelo.versao + 1, atualizado_em=func.now())
+    )
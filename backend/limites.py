@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from jose import jwt, JWTError
+from main import SECRET_KEY, ALGORITHM
+from cache_usuarios import cache_usuarios
+
+LIMITES_ATIVOS = os.getenv("LIMITES_ATIVOS", "true").lower() == "true"
+LIMITES_URL = os.getenv("LIMITES_URL")
+LIMITES_PREFIXO = os.getenv("LIMITES_PREFIXO", "rede-social:limite:")
+LIMITES_MAX_CHAVES = int(os.getenv("LIMITES_MAX_CHAVES", "100000"))
+
+PERIODOS = {"second": 1, "minute": 60, "hour": 3600, "s": 1, "min": 60, "h": 3600}
+
+logger = logging.getLogger(__name__)
+
+# "10/minute" -> (capacidade 10, 10/60 fichas por segundo); vazio ou 0 desliga
+def _taxa(texto):
+    if not texto:
+        return None
+    quantidade, _, periodo = texto.partition("/")
+    quantidade = int(quantidade)
+    if quantidade <= 0:
+        return None
+    return quantidade, quantidade / PERIODOS[periodo.strip() or "second"]
+
+# Balde de fichas: enche `por_segundo` até `capacidade` e cada requisição gasta
+# uma. `consumir` devolve 0 se havia ficha, ou quantos segundos faltam para a próxima.
+class LojaMemoria:
+    def __init__(self, max_chaves=LIMITES_MAX_CHAVES):
+        self._baldes = OrderedDict()
+        self._max_chaves = max_chaves
+    
+    async def consumir(self, chave, capacidade, por_segundo):
+        agora = time.monotonic()
+        fichas, antes = self._baldes.pop(chave, (capacidade, agora))
+        fichas = min(capacidade, fichas + (agora - antes) * por_segundo)
+        espera = 0
+        if fichas >= 1:
+            fichas -= 1
+        else:
+            espera = (1 - fichas) / por_segundo
+        self._baldes[chave] = (fichas, agora)
+        # os baldes esquecidos são os usados há mais tempo, que já estariam cheios
+        while len(self._baldes) > self._max_chaves:
+            self._baldes.popitem(last=False)
+        return espera
+    
+    async def parar(self):
+        pass
+
+# Mesmo algoritmo num script Lua, atômico no Redis e compartilhado entre os
+# workers; a chave expira quando o balde estaria cheio de novo.
+SCRIPT_BALDE = """
+local capacidade = tonumber(ARGV[1])
+local por_segundo = tonumber(ARGV[2])
+local relogio = redis.call('TIME')
+local agora = tonumber(relogio[1]) + tonumber(relogio[2]) / 1000000
+local balde = redis.call('HMGET', KEYS[1], 'fichas', 'em')
+local fichas = tonumber(balde[1]) or capacidade
+local antes = tonumber(balde[2]) or agora
+fichas = math.min(capacidade, fichas + (agora - antes) * por_segundo)
+local espera = 0
+if fichas >= 1 then
+    fichas = fichas - 1
+else
+    espera = (1 - fichas) / por_segundo
+end
+redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'em', tostring(agora))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacidade / por_segundo * 1000))
+return tostring(espera)
+"""
+
+class LojaRedis:
+    def __init__(self, url, prefixo=LIMITES_PREFIXO):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("LIMITES_URL configurado, mas o pacote redis não está instalado")
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(SCRIPT_BALDE)
+        self._prefixo = prefixo
+    
+    async def consumir(self, chave, capacidade, por_segundo):
+        try:
+            espera = await self._script(keys=[self._prefixo + chave], args=[capacidade, por_segundo])
+        except Exception:
+            # sem o Redis as requisições passam: melhor sem limite do que fora do ar
+            logger.exception("Falha ao consultar o limite de %s", chave)
+            return 0
+        return float(espera)
+    
+    async def parar(self):
+        await self._redis.aclose()
+
+loja = LojaRedis(LIMITES_URL) if LIMITES_URL else LojaMemoria()
+
+# atrás de um proxy, rode o uvicorn com --proxy-headers para client.host ser o IP real
+def _ip(request):
+    return request.client.host if request.client else "desconhecido"
+
+# só identifica quem é; a autenticação de verdade continua nas rotas
+def _usuario(request):
+    esquema, _, token = request.headers.get("authorization", "").partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    usuario = cache_usuarios.obter(token, contar=False)
+    if usuario:
+        return usuario.id
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+# Uso: @router.get(..., dependencies=[Depends(limitar("listagem", por_ip="300/minute"))]).
+# Os valores podem ser trocados por LIMITE_<NOME>_IP e LIMITE_<NOME>_USUARIO.
+def limitar(nome, por_ip=None, por_usuario=None):
+    taxa_ip = _taxa(os.getenv(f"LIMITE_{nome.upper()}_IP", por_ip))
+    taxa_usuario = _taxa(os.getenv(f"LIMITE_{nome.upper()}_USUARIO", por_usuario))
+    
+    async def verificar_limite(request: Request):
+        if not LIMITES_ATIVOS:
+            return
+        espera = 0
+        if taxa_ip:
+            espera = await loja.consumir(f"{nome}:ip:{_ip(request)}", *taxa_ip)
+        usuario_id = _usuario(request) if taxa_usuario else None
+        if usuario_id is not None:
+            espera = max(espera, await loja.consumir(f"{nome}:usuario:{usuario_id}", *taxa_usuario))
+        if espera > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Muitas requisições, tente novamente mais tarde",
+                headers={"Retry-After": str(math.ceil(espera))}
+            )
+    return verificar_limite
+
+# Limite de requisições simultâneas de uma classe de rotas neste worker: quem
+# passa do máximo espera até `espera_max` por uma vaga e depois recebe 503,
+# antes que a fila faça a latência de todo mundo disparar.
+class Admissao:
+    def __init__(self, nome, maximo, espera_max):
+        self.nome = nome
+        self.maximo = maximo
+        self.espera_max = espera_max
+        self._semaforo = asyncio.Semaphore(max(maximo, 1))
+        self.em_uso = 0
+        self.aguardando = 0
+        self.admitidas = 0
+        self.recusadas = 0
+    
+    async def entrar(self):
+        if not LIMITES_ATIVOS or self.maximo <= 0:
+            yield
+            return
+        if self._semaforo.locked():
+            self.aguardando += 1
+            try:
+                await asyncio.wait_for(self._semaforo.acquire(), self.espera_max)
+            except asyncio.TimeoutError:
+                self.recusadas += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Servidor ocupado, tente novamente em instantes",
+                    headers={"Retry-After": "1"}
+                )
+            finally:
+                self.aguardando -= 1
+        else:
+            await self._semaforo.acquire()
+        self.em_uso += 1
+        self.admitidas += 1
+        try:
+            yield
+        finally:
+            self.em_uso -= 1
+            self._semaforo.release()
+    
+    def estatisticas(self):
+        return {
+            "maximo": self.maximo,
+            "em_uso": self.em_uso,
+            "aguardando": self.aguardando,
+            "admitidas": self.admitidas,
+            "recusadas": self.recusadas
+        }
+
+# rotas de leitura que varrem ou juntam muitas linhas
+listagem = Admissao(
+    "listagem",
+    int(os.getenv("ADMISSAO_LISTAGEM_MAX", "16")),
+    int(os.getenv("ADMISSAO_LISTAGEM_ESPERA_MS", "200")) / 1000
+)
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from serializacao import RespostaJSON
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2PasswordBearer
 
 load_dotenv()
@@ -11,7 +15,29 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACESS_TOKEN_EXPIRE_MINUTES")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    calibrar_custo()
+    aquecer_pool()
+    await aquecer_pool_async()
+    await iniciar_broker()
+    hub.ouvir(cache_usuarios.atualizar)
+    hub.ouvir(indice.atualizar)
+    await indice.carregar()
+    hub.ouvir(grafo.atualizar)
+    await grafo.carregar()
+    hub.ouvir(cache_enquetes.atualizar)
+    hub.ouvir(tendencias.atualizar)
+    await tendencias.iniciar()
+    iniciar_aparador()
+    yield
+    parar_aparador()
+    await tendencias.parar()
+    encerrar_midia()
+    await loja_limites.parar()
+    await broker.parar()
+
+app = FastAPI(lifespan=lifespan, default_response_class=RespostaJSON)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,17 +47,103 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# respostas menores que COMPRESSAO_MIN_BYTES não compensam o custo de comprimir
+COMPRESSAO_MIN_BYTES = int(os.getenv("COMPRESSAO_MIN_BYTES", "1024"))
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(
+        BrotliMiddleware,
+        minimum_size=COMPRESSAO_MIN_BYTES,
+        gzip_fallback=True,
+        excluded_handlers=["/social/eventos", "/midia"]
+    )
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSAO_MIN_BYTES)
+
+from perfilador import MiddlewarePerfil, ativo as perfil_ativo
+if perfil_ativo():
+    app.add_middleware(MiddlewarePerfil)
+
+# adicionado por último para ficar por fora de todos os outros e medir a requisição inteira
+from metricas import MiddlewareMetricas, exportar as exportar_metricas
+app.add_middleware(MiddlewareMetricas)
+
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 bearer_scheme = HTTPBearer()
 
 from auth_routes import auth_router
 from posts_routes import posts_router
 from social_routes import social_router
+from midia_routes import midia_router
+from perfis_routes import perfis_router
+from senhas import calibrar_custo
+from models import db, db_async, aquecer_pool, aquecer_pool_async
+from broker import broker, iniciar as iniciar_broker
+from eventos import hub
+from busca import indice
+from grafo import grafo
+from tendencias import tendencias
+from timeline import iniciar_aparador, parar_aparador
+from midia import encerrar as encerrar_midia
+from cache_usuarios import cache_usuarios
+from cache_enquetes import cache_enquetes
+from limites import loja as loja_limites, listagem
 
 app.include_router(auth_router)
 app.include_router(posts_router)
 app.include_router(social_router)
+app.include_router(midia_router)
+app.include_router(perfis_router)
 
 @app.get("/")
 async def root():
-    return {"mensagem": "Bem-vindo ao servidor Python!"}
\ No newline at end of file
+    return {"mensagem": "Bem-vindo ao servidor Python!"}
+
+@app.get("/metricas/pool")
+async def metricas_pool():
+    return {
+        "sync": db.pool.estatisticas(),
+        "async": db_async.pool.estatisticas()
+    }
+
+@app.get("/metricas/eventos")
+async def metricas_eventos():
+    return hub.estatisticas()
+
+@app.get("/metricas/busca")
+async def metricas_busca():
+    return indice.estatisticas()
+
+@app.get("/metricas/grafo")
+async def metricas_grafo():
+    return grafo.estatisticas()
+
+@app.get("/metricas/cache")
+async def metricas_cache():
+    return {
+        "usuarios": cache_usuarios.estatisticas(),
+        "enquetes": cache_enquetes.estatisticas()
+    }
+
+@app.get("/metricas/tendencias")
+async def metricas_tendencias():
+    return tendencias.estatisticas()
+
+@app.get("/metricas/admissao")
+async def metricas_admissao():
+    return {"listagem": listagem.estatisticas()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    estatisticas = {
+        "pool_sync": db.pool.estatisticas(),
+        "pool_async": db_async.pool.estatisticas(),
+        "cache_usuarios": cache_usuarios.estatisticas(),
+        "cache_enquetes": cache_enquetes.estatisticas(),
+        "eventos": hub.estatisticas(),
+        "busca": indice.estatisticas(),
+        "grafo": grafo.estatisticas(),
+        "tendencias": tendencias.estatisticas(),
+        "admissao_listagem": listagem.estatisticas()
+    }
+    return PlainTextResponse(exportar_metricas(estatisticas), media_type="text/plain; version=0.0.4")
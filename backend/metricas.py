@@ -0,0 +1,170 @@
+import contextvars
+import logging
+import os
+import time
+from sqlalchemy import event
+from models import db, db_async
+
+METRICAS_LENTA_MS = int(os.getenv("METRICAS_LENTA_MS", "500"))
+METRICAS_MAX_INSTRUCOES = int(os.getenv("METRICAS_MAX_INSTRUCOES", "50"))
+
+# mesmos limites padrão dos clientes Prometheus, em segundos
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+LIMITES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# conexões de longa duração distorceriam o histograma de latência
+ROTAS_IGNORADAS = {"/social/eventos"}
+
+logger = logging.getLogger(__name__)
+
+class Medicao:
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.instrucoes = []
+
+# A contextvar acompanha a requisição do middleware até as rotas, inclusive as
+# dependências síncronas, que rodam no threadpool com uma cópia do contexto.
+_medicao_atual = contextvars.ContextVar("medicao_atual", default=None)
+
+# o início fica no contexto da instrução: se ela falhar, after_cursor_execute
+# não é chamado e nada sobra na conexão do pool
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metricas_inicio = time.perf_counter()
+
+def _depois(conn, cursor, statement, parameters, context, executemany):
+    medicao = _medicao_atual.get()
+    inicio = getattr(context, "_metricas_inicio", None)
+    if medicao is None or inicio is None:
+        return
+    tempo = time.perf_counter() - inicio
+    medicao.consultas += 1
+    medicao.tempo_sql += tempo
+    if len(medicao.instrucoes) < METRICAS_MAX_INSTRUCOES:
+        medicao.instrucoes.append((tempo, statement))
+
+for _engine in (db, db_async.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _antes)
+    event.listen(_engine, "after_cursor_execute", _depois)
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.soma = 0
+        self.total = 0
+    
+    def observar(self, valor):
+        self.soma += valor
+        self.total += 1
+        for posicao, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[posicao] += 1
+
+class Registro:
+    def __init__(self):
+        self.em_andamento = 0
+        self.requisicoes = {}
+        self.duracao = {}
+        self.consultas = {}
+        self.tempo_sql = {}
+    
+    def registrar(self, metodo, rota, status, duracao, medicao):
+        chave = (metodo, rota)
+        self.requisicoes[chave + (status,)] = self.requisicoes.get(chave + (status,), 0) + 1
+        self.duracao.setdefault(chave, Histograma(LIMITES_DURACAO)).observar(duracao)
+        self.consultas.setdefault(chave, Histograma(LIMITES_CONSULTAS)).observar(medicao.consultas)
+        self.tempo_sql[chave] = self.tempo_sql.get(chave, 0.0) + medicao.tempo_sql
+
+registro = Registro()
+
+class MiddlewareMetricas:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+    
+        medicao = Medicao()
+        marca = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        resultado = {"status": 500, "fim": None}
+    
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                resultado["status"] = mensagem["status"]
+            elif mensagem["type"] == "http.response.body" and not mensagem.get("more_body"):
+                resultado["fim"] = time.perf_counter()
+            await send(mensagem)
+    
+        registro.em_andamento += 1
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            registro.em_andamento -= 1
+            _medicao_atual.reset(marca)
+            # o roteador grava a rota encontrada no próprio scope; usar o molde
+            # (/posts/{id}) e não o caminho evita uma série por id
+            rota = getattr(scope.get("route"), "path", None) or "desconhecida"
+            if rota not in ROTAS_IGNORADAS:
+                duracao = (resultado["fim"] or time.perf_counter()) - inicio
+                registro.registrar(scope["method"], rota, resultado["status"], duracao, medicao)
+                if duracao * 1000 >= METRICAS_LENTA_MS:
+                    _registrar_lenta(scope, resultado["status"], duracao, medicao)
+
+def _registrar_lenta(scope, status, duracao, medicao):
+    linhas = [
+        f"Requisição lenta: {scope['method']} {scope['path']} -> {status} em {duracao * 1000:.1f} ms, "
+        f"{medicao.consultas} consulta(s) SQL em {medicao.tempo_sql * 1000:.1f} ms"
+    ]
+    for tempo, instrucao in sorted(medicao.instrucoes, key=lambda item: item[0], reverse=True):
+        linhas.append(f"  {tempo * 1000:8.2f} ms  {' '.join(instrucao.split())}")
+    if medicao.consultas > len(medicao.instrucoes):
+        linhas.append(f"  ... mais {medicao.consultas - len(medicao.instrucoes)} consulta(s) não guardadas")
+    logger.warning("\n".join(linhas))
+
+def _rotulos(**valores):
+    texto = ",".join(
+        f'{nome}="{str(valor).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for nome, valor in valores.items()
+    )
+    return "{" + texto + "}" if texto else ""
+
+def _histograma(linhas, nome, ajuda, series):
+    linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} histogram"]
+    for (metodo, rota), histograma in sorted(series.items()):
+        for limite, contagem in zip(histograma.limites, histograma.contagens):
+            linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le=limite)} {contagem}")
+        linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le='+Inf')} {histograma.total}")
+        linhas.append(f"{nome}_sum{_rotulos(metodo=metodo, rota=rota)} {histograma.soma}")
+        linhas.append(f"{nome}_count{_rotulos(metodo=metodo, rota=rota)} {histograma.total}")
+
+# `estatisticas` recebe os dicionários de /metricas/* (pool, cache, eventos...)
+# e cada valor numérico vira um gauge <grupo>_<chave>.
+def exportar(estatisticas):
+    linhas = [
+        "# HELP http_requisicoes_em_andamento Requisições sendo atendidas agora",
+        "# TYPE http_requisicoes_em_andamento gauge",
+        f"http_requisicoes_em_andamento {registro.em_andamento}",
+        "# HELP http_requisicoes_total Requisições atendidas por rota e status",
+        "# TYPE http_requisicoes_total counter"
+    ]
+    for (metodo, rota, status), quantidade in sorted(registro.requisicoes.items()):
+        linhas.append(f"http_requisicoes_total{_rotulos(metodo=metodo, rota=rota, status=status)} {quantidade}")
+    _histograma(linhas, "http_requisicao_duracao_segundos", "Duração das requisições por rota", registro.duracao)
+    _histograma(linhas, "http_requisicao_consultas_sql", "Consultas SQL por requisição", registro.consultas)
+    linhas += [
+        "# HELP http_requisicao_sql_segundos_total Tempo gasto em SQL por rota",
+        "# TYPE http_requisicao_sql_segundos_total counter"
+    ]
+    for (metodo, rota), tempo in sorted(registro.tempo_sql.items()):
+        linhas.append(f"http_requisicao_sql_segundos_total{_rotulos(metodo=metodo, rota=rota)} {tempo}")
+    
+    for grupo, valores in estatisticas.items():
+        for chave, valor in valores.items():
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                nome = f"{grupo}_{chave}"
+                linhas += [f"# TYPE {nome} gauge", f"{nome} {valor}"]
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from models import SessaoAsync, Midia
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+MIDIA_DIR = os.getenv("MIDIA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "midia")
+MIDIA_MAX_BYTES = int(os.getenv("MIDIA_MAX_BYTES", str(10 * 1024 * 1024)))
+MIDIA_TRABALHADORES = int(os.getenv("MIDIA_TRABALHADORES", "2"))
+MIDIA_MINIATURA_PX = int(os.getenv("MIDIA_MINIATURA_PX", "320"))
+MIDIA_WEB_PX = int(os.getenv("MIDIA_WEB_PX", "1600"))
+
+TIPOS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/avif": "avif"
+}
+
+# primeiros bytes de cada formato, para não aceitar qualquer coisa com o Content-Type certo
+ASSINATURAS = {
+    "jpg": lambda inicio: inicio.startswith(b"\xff\xd8\xff"),
+    "png": lambda inicio: inicio.startswith(b"\x89PNG\r\n\x1a\n"),
+    "gif": lambda inicio: inicio[:6] in (b"GIF87a", b"GIF89a"),
+    "webp": lambda inicio: inicio[:4] == b"RIFF" and inicio[8:12] == b"WEBP",
+    "avif": lambda inicio: inicio[4:12] in (b"ftypavif", b"ftypavis")
+}
+
+VARIANTES = ("miniatura", "web")
+
+NOME_ARQUIVO = re.compile(r"^([0-9a-f]{64})(?:-(miniatura|web))?\.(jpg|png|gif|webp|avif)$")
+URL_MIDIA = re.compile(r"^/midia/([0-9a-f]{64})(?:-(?:miniatura|web))?\.(?:jpg|png|gif|webp|avif)$")
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_tarefas = set()
+
+def nome_arquivo(hash, extensao, variante=None):
+    if variante:
+        return f"{hash}-{variante}.webp"
+    return f"{hash}.{extensao}"
+
+def caminho(nome):
+    # subpastas pelos dois primeiros caracteres do hash, para não juntar tudo num diretório só
+    return os.path.join(MIDIA_DIR, nome[:2], nome)
+
+def para_dict(midia):
+    extensao = TIPOS[midia.tipo]
+    variantes = [v for v in midia.variantes.split(",") if v]
+    return {
+        "hash": midia.hash,
+        "tipo": midia.tipo,
+        "tamanho": midia.tamanho,
+        "url": f"/midia/{nome_arquivo(midia.hash, extensao)}",
+        "variantes": {v: f"/midia/{nome_arquivo(midia.hash, extensao, v)}" for v in variantes}
+    }
+
+def _limpar(temporario):
+    try:
+        os.remove(temporario)
+    except FileNotFoundError:
+        pass
+
+# Grava o corpo da requisição em disco à medida que chega, calculando o sha256
+# no caminho; em nenhum momento o arquivo inteiro fica em memória.
+async def receber(request, tipo):
+    extensao = TIPOS.get(tipo)
+    if not extensao:
+        raise HTTPException(status_code=415, detail="Tipo de mídia não suportado")
+    
+    declarado = request.headers.get("content-length")
+    if declarado and declarado.isdigit() and int(declarado) > MIDIA_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Arquivo maior que o permitido")
+    
+    pasta_temporaria = os.path.join(MIDIA_DIR, "tmp")
+    os.makedirs(pasta_temporaria, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta_temporaria)
+    resumo = hashlib.sha256()
+    tamanho = 0
+    inicio = b""
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            async for pedaco in request.stream():
+                tamanho += len(pedaco)
+                if tamanho > MIDIA_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Arquivo maior que o permitido")
+                if len(inicio) < 16:
+                    inicio += pedaco[:16 - len(inicio)]
+                resumo.update(pedaco)
+                await asyncio.to_thread(arquivo.write, pedaco)
+    
+        if not tamanho:
+            raise HTTPException(status_code=400, detail="Arquivo vazio")
+        if not ASSINATURAS[extensao](inicio):
+            raise HTTPException(status_code=415, detail="O conteúdo não corresponde ao tipo informado")
+    
+        hash = resumo.hexdigest()
+        destino = caminho(nome_arquivo(hash, extensao))
+        if os.path.exists(destino):
+            _limpar(temporario)
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(temporario, destino)
+    except BaseException:
+        _limpar(temporario)
+        raise
+    return hash, tamanho
+
+# Roda nos processos do pool: redimensionar imagens é CPU pura e seguraria o GIL.
+def _gerar_variantes(origem, destinos):
+    with Image.open(origem) as imagem:
+        imagem.load()
+        if imagem.mode not in ("RGB", "RGBA"):
+            imagem = imagem.convert("RGBA" if "transparency" in imagem.info else "RGB")
+        for variante, lado in (("web", MIDIA_WEB_PX), ("miniatura", MIDIA_MINIATURA_PX)):
+            copia = imagem.copy()
+            copia.thumbnail((lado, lado))
+            temporario = destinos[variante] + ".tmp"
+            copia.save(temporario, "WEBP", quality=80)
+            os.replace(temporario, destinos[variante])
+    return list(destinos)
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MIDIA_TRABALHADORES)
+    return _executor
+
+async def _processar(hash, extensao):
+    origem = caminho(nome_arquivo(hash, extensao))
+    destinos = {v: caminho(nome_arquivo(hash, extensao, v)) for v in VARIANTES}
+    try:
+        variantes = await asyncio.get_running_loop().run_in_executor(_pool(), _gerar_variantes, origem, destinos)
+    except Exception:
+        logger.exception("Falha ao gerar variantes de %s", hash)
+        return
+    async with SessaoAsync() as session:
+        await session.execute(update(Midia).where(Midia.hash == hash).values(variantes=",".join(variantes)))
+        await session.commit()
+
+# Sem o Pillow instalado as mídias são servidas só no formato original.
+def agendar_variantes(hash, tipo):
+    if Image is None:
+        return
+    tarefa = asyncio.create_task(_processar(hash, TIPOS[tipo]))
+    _tarefas.add(tarefa)
+    tarefa.add_done_callback(_tarefas.discard)
+
+def encerrar():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+# midia de posts e enquetes: URLs do próprio armazenamento precisam existir,
+# e imagens embutidas em base64 são recusadas
+async def validar_referencia(session, midia):
+    if not midia:
+        return None
+    if midia.startswith("data:"):
+        raise HTTPException(status_code=400, detail="Envie a mídia por /midia/upload e use a URL devolvida")
+    encontrado = URL_MIDIA.match(midia)
+    if encontrado:
+        existe = (await session.execute(select(Midia.hash).where(Midia.hash == encontrado.group(1)))).scalar_one_or_none()
+        if not existe:
+            raise HTTPException(status_code=404, detail="Mídia não encontrada")
+    return midia
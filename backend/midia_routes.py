@@ -0,0 +1,56 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dependencies import pegar_sessao_async, verificar_token_async
+from midia import NOME_ARQUIVO, receber, agendar_variantes, caminho, para_dict
+from models import Midia
+from schemas_rede import UsuarioPublico
+
+midia_router = APIRouter(prefix="/midia", tags=["midia"])
+
+# o nome do arquivo é o hash do conteúdo, então ele nunca muda de conteúdo
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+# O corpo da requisição é o próprio arquivo (fetch com body: file), com o
+# Content-Type da imagem; assim dá para gravar em disco enquanto chega.
+@midia_router.post("/upload")
+async def enviar_midia(
+    request: Request,
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    tipo = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    hash, tamanho = await receber(request, tipo)
+    
+    resultado = await session.execute(
+        insert(Midia)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .values(hash=hash, usuario_id=usuario.id, tipo=tipo, tamanho=tamanho)
+    )
+    await session.commit()
+    nova = resultado.rowcount == 1
+    if nova:
+        agendar_variantes(hash, tipo)
+    
+    midia = (await session.execute(select(Midia).where(Midia.hash == hash))).scalar_one()
+    return {**para_dict(midia), "nova": nova}
+
+@midia_router.get("/{nome}")
+async def servir_midia(nome: str, request: Request):
+    if not NOME_ARQUIVO.match(nome):
+        raise HTTPException(status_code=404, detail="Mídia não encontrada")
+    arquivo = caminho(nome)
+    if not os.path.isfile(arquivo):
+        # variantes ainda não geradas também caem aqui; o cliente usa a original
+        raise HTTPException(status_code=404, detail="Mídia não encontrada", headers={"Cache-Control": "no-store"})
+    
+    cabecalhos = {"Cache-Control": CACHE_IMUTAVEL, "X-Content-Type-Options": "nosniff"}
+    # qualquer cópia que o cliente tenha deste nome é a atual
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        return Response(status_code=304, headers=cabecalhos)
+    
+    # o FileResponse responde Range com 206 e envia o arquivo em pedaços
+    return FileResponse(arquivo, headers=cabecalhos)
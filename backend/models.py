@@ -1,23 +1,80 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, func, Table
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, func, Table, Index, UniqueConstraint, false
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
 from datetime import datetime
 from sqlalchemy_utils.types import ChoiceType
 import pymysql, os
 from dotenv import load_dotenv
+from pool_medido import PoolMedido, PoolMedidoAsync
 
 load_dotenv()
 
-SQL_DATABASE_URL = f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+SQL_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+)
+SQL_DATABASE_URL_ASYNC = os.getenv(
+    "DATABASE_URL_ASYNC",
+    SQL_DATABASE_URL.replace("mysql+pymysql://", "mysql+aiomysql://").replace("sqlite://", "sqlite+aiosqlite://")
+)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "sim")
+DB_POOL_AQUECER = int(os.getenv("DB_POOL_AQUECER", str(DB_POOL_SIZE)))
+
+CONFIG_POOL = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING
+)
+if SQL_DATABASE_URL.startswith("sqlite"):
+    CONFIG_POOL["connect_args"] = {"check_same_thread": False}
+
+db = create_engine(SQL_DATABASE_URL, poolclass=PoolMedido, **CONFIG_POOL)
+SessaoLocal = sessionmaker(bind=db)
+
+db_async = create_async_engine(SQL_DATABASE_URL_ASYNC, poolclass=PoolMedidoAsync, **CONFIG_POOL)
+SessaoAsync = async_sessionmaker(db_async, expire_on_commit=False)
 
-db = create_engine(SQL_DATABASE_URL)
 Base = declarative_base()
 
+# O SQLite grava CURRENT_TIMESTAMP sem microssegundos; usar o mesmo formato nos
+# parâmetros mantém as comparações de data (paginação por cursor) consistentes.
+DataHora = DateTime().with_variant(
+    SQLITE_DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+def aquecer_pool(quantidade=DB_POOL_AQUECER):
+    conexoes = []
+    try:
+        for _ in range(min(quantidade, DB_POOL_SIZE)):
+            conexoes.append(db.connect())
+    finally:
+        for conexao in conexoes:
+            conexao.close()
+
+async def aquecer_pool_async(quantidade=DB_POOL_AQUECER):
+    conexoes = []
+    try:
+        for _ in range(min(quantidade, DB_POOL_SIZE)):
+            conexoes.append(await db_async.connect())
+    finally:
+        for conexao in conexoes:
+            await conexao.close()
 
 seguidor_association = Table(
     'seguidor',
     Base.metadata,
     Column('seguidor_id', Integer, ForeignKey('usuarios.id'), primary_key=True),
-    Column('seguindo_id', Integer, ForeignKey('usuarios.id'), primary_key=True)
+    Column('seguindo_id', Integer, ForeignKey('usuarios.id'), primary_key=True),
+    Index('ix_seguidor_seguindo_id', 'seguindo_id', 'seguidor_id')
 )
 
 class Usuario(Base):
@@ -27,7 +84,10 @@ class Usuario(Base):
     nome = Column("nome", String(200), nullable=False)
     email = Column("email", String(200), nullable=False, unique=True)
     senha = Column("senha", String(300), nullable=False)
-    criado_em = Column("criado_em", DateTime, server_default=func.now())
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
+    popular = Column("popular", Boolean, nullable=False, default=False, server_default=false())
+    versao = Column("versao", Integer, nullable=False, default=1, server_default="1")
+    atualizado_em = Column("atualizado_em", DataHora, server_default=func.now(), onupdate=func.now())
     
     
     comentarios = relationship("Comentario", foreign_keys="Comentario.usuario_id", cascade="all, delete")
@@ -59,13 +119,22 @@ class Comentario(Base):
     titulo = Column("titulo", String(500), nullable=True)
     midia = Column("midia", String(500))
     conteudo = Column("conteudo", Text, nullable=False)
-    criado_em = Column("criado_em", DateTime, server_default=func.now())
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
+    curtidas_count = Column("curtidas_count", Integer, nullable=False, default=0, server_default="0")
+    respostas_count = Column("respostas_count", Integer, nullable=False, default=0, server_default="0")
+    versao = Column("versao", Integer, nullable=False, default=1, server_default="1")
+    atualizado_em = Column("atualizado_em", DataHora, server_default=func.now(), onupdate=func.now())
     
     
     usuario = relationship("Usuario", foreign_keys=[usuario_id])
     curtidas = relationship("Curtida", foreign_keys="Curtida.comentario_id", cascade="all, delete")
     respostas = relationship("Resposta", foreign_keys="Resposta.comentario_id", cascade="all, delete")
     
+    __table_args__ = (
+        Index("ix_comentarios_criado_em", "criado_em", "id"),
+        Index("ix_comentarios_usuario_criado_em", "usuario_id", "criado_em", "id"),
+    )
+    
     def __init__(self, usuario_id, titulo, conteudo, midia=None):
         self.usuario_id = usuario_id
         self.titulo = titulo
@@ -81,7 +150,11 @@ class Enquete(Base):
     titulo = Column("titulo", String(200), nullable=True)
     conteudo = Column("conteudo", Text, nullable=False)
     midia = Column("midia", String(500))
-    criado_em = Column("criado_em", DateTime, server_default=func.now())
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
+    curtidas_count = Column("curtidas_count", Integer, nullable=False, default=0, server_default="0")
+    respostas_count = Column("respostas_count", Integer, nullable=False, default=0, server_default="0")
+    versao = Column("versao", Integer, nullable=False, default=1, server_default="1")
+    atualizado_em = Column("atualizado_em", DataHora, server_default=func.now(), onupdate=func.now())
     
     
     usuario = relationship("Usuario", foreign_keys=[usuario_id])
@@ -89,6 +162,11 @@ class Enquete(Base):
     votos = relationship("Voto", foreign_keys="Voto.enquete_id", cascade="all, delete")
     curtidas = relationship("Curtida", foreign_keys="Curtida.enquete_id", cascade="all, delete")
     
+    __table_args__ = (
+        Index("ix_enquetes_criado_em", "criado_em", "id"),
+        Index("ix_enquetes_usuario_criado_em", "usuario_id", "criado_em", "id"),
+    )
+    
     def __init__(self, usuario_id, nome, titulo, conteudo, midia=None):
         self.usuario_id = usuario_id
         self.nome = nome
@@ -108,6 +186,10 @@ class Opcoes(Base):
     enquete = relationship("Enquete", back_populates="opcoes")
     votos_rel = relationship("Voto", foreign_keys="Voto.opcao_id", cascade="all, delete")
     
+    __table_args__ = (
+        Index("ix_opcoes_enquete_enquete_id", "enquete_id"),
+    )
+    
     def __init__(self, enquete_id, conteudo):
         self.enquete_id = enquete_id
         self.conteudo = conteudo
@@ -119,13 +201,19 @@ class Curtida(Base):
     usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False)
     comentario_id = Column("comentario_id", Integer, ForeignKey("comentarios.id"), nullable=True)
     enquete_id = Column("enquete_id", Integer, ForeignKey("enquetes.id"), nullable=True)
-    criado_em = Column("criado_em", DateTime, server_default=func.now())
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
     
     
     usuario = relationship("Usuario", foreign_keys=[usuario_id])
     comentario = relationship("Comentario", foreign_keys=[comentario_id])
     enquete = relationship("Enquete", foreign_keys=[enquete_id])
     
+    __table_args__ = (
+        UniqueConstraint("usuario_id", "comentario_id", name="uq_curtidas_usuario_comentario"),
+        Index("ix_curtidas_comentario_id", "comentario_id"),
+        Index("ix_curtidas_enquete_id", "enquete_id"),
+    )
+    
     def __init__(self, usuario_id, comentario_id=None, enquete_id=None):
         self.usuario_id = usuario_id
         self.comentario_id = comentario_id
@@ -138,12 +226,16 @@ class Resposta(Base):
     usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False)
     comentario_id = Column("comentario_id", Integer, ForeignKey("comentarios.id"), nullable=False)
     conteudo = Column("conteudo", Text, nullable=False)
-    criado_em = Column("criado_em", DateTime, server_default=func.now())
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
     
     
     usuario = relationship("Usuario", foreign_keys=[usuario_id])
     comentario = relationship("Comentario", foreign_keys=[comentario_id])
     
+    __table_args__ = (
+        Index("ix_respostas_comentario_id", "comentario_id"),
+    )
+    
     def __init__(self, usuario_id, comentario_id, conteudo):
         self.usuario_id = usuario_id
         self.comentario_id = comentario_id
@@ -156,15 +248,58 @@ class Voto(Base):
     usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False)
     enquete_id = Column("enquete_id", Integer, ForeignKey("enquetes.id"), nullable=False)
     opcao_id = Column("opcao_id", Integer, ForeignKey("opcoes_enquete.id"), nullable=False)
-    criado_em = Column("criado_em", DateTime, server_default=func.now())
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
     
 
     usuario = relationship("Usuario", foreign_keys=[usuario_id])
     enquete = relationship("Enquete", foreign_keys=[enquete_id])
     opcao = relationship("Opcoes", foreign_keys=[opcao_id])
     
+    __table_args__ = (
+        UniqueConstraint("usuario_id", "enquete_id", name="uq_votos_usuario_enquete"),
+    )
+    
     def __init__(self, usuario_id, enquete_id, opcao_id):
         self.usuario_id = usuario_id
         self.enquete_id = enquete_id
         self.opcao_id = opcao_id
-    
\ No newline at end of file
+
+class TimelineItem(Base):
+    __tablename__ = "timeline"
+    
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False)
+    autor_id = Column("autor_id", Integer, ForeignKey("usuarios.id"), nullable=False)
+    tipo = Column("tipo", String(20), nullable=False)
+    item_id = Column("item_id", Integer, nullable=False)
+    criado_em = Column("criado_em", DataHora, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_timeline_usuario_criado_em", "usuario_id", "criado_em", "item_id"),
+        Index("ix_timeline_tipo_item", "tipo", "item_id"),
+    )
+    
+    def __init__(self, usuario_id, autor_id, tipo, item_id, criado_em):
+        self.usuario_id = usuario_id
+        self.autor_id = autor_id
+        self.tipo = tipo
+        self.item_id = item_id
+        self.criado_em = criado_em
+
+# Arquivos enviados são endereçados pelo sha256 do conteúdo: o mesmo arquivo
+# enviado duas vezes ocupa uma única linha e um único arquivo em disco.
+class Midia(Base):
+    __tablename__ = "midias"
+    
+    hash = Column("hash", String(64), primary_key=True)
+    usuario_id = Column("usuario_id", Integer, ForeignKey("usuarios.id"), nullable=False)
+    tipo = Column("tipo", String(50), nullable=False)
+    tamanho = Column("tamanho", Integer, nullable=False)
+    variantes = Column("variantes", String(100), nullable=False, default="", server_default="")
+    criado_em = Column("criado_em", DataHora, server_default=func.now())
+    
+    def __init__(self, hash, usuario_id, tipo, tamanho):
+        self.hash = hash
+        self.usuario_id = usuario_id
+        self.tipo = tipo
+        self.tamanho = tamanho
@@ -0,0 +1,25 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+
+def codificar_cursor(criado_em, id):
+    bruto = f"{criado_em.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+def decodificar_cursor(cursor):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor.encode()).decode()
+        data, id = bruto.split("|")
+        return datetime.fromisoformat(data), int(id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+# listas sem data (seguidores) ou ordenadas só pelo id usam o próprio id como cursor
+def codificar_cursor_id(id):
+    return base64.urlsafe_b64encode(str(id).encode()).decode()
+
+def decodificar_cursor_id(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
@@ -0,0 +1,210 @@
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from fastapi import HTTPException, Request
+
+PERFIL_TOKEN = os.getenv("PERFIL_TOKEN", "")
+PERFIL_AMOSTRAGEM = float(os.getenv("PERFIL_AMOSTRAGEM", "0"))
+PERFIL_INTERVALO_MS = float(os.getenv("PERFIL_INTERVALO_MS", "1"))
+PERFIL_DIR = os.getenv("PERFIL_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfis")
+PERFIL_MAX_ARQUIVOS = int(os.getenv("PERFIL_MAX_ARQUIVOS", "100"))
+
+CABECALHO = "x-perfil"
+PARAMETRO = "perfil"
+AGUARDANDO = "(aguardando)"
+
+# 20261018T093851123456_GET_social-enquetes-listar_152ms.collapsed
+NOME_PERFIL = re.compile(r"^(\d{8}T\d{12})_([A-Z]+)_([\w-]*)_(\d+)ms\.(collapsed|speedscope\.json)$")
+
+PASTA_BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+def ativo():
+    return bool(PERFIL_TOKEN) or PERFIL_AMOSTRAGEM > 0
+
+def _token_valido(token):
+    return bool(PERFIL_TOKEN) and bool(token) and hmac.compare_digest(token.encode(), PERFIL_TOKEN.encode())
+
+def verificar_token_perfil(request: Request):
+    if not _token_valido(request.headers.get(CABECALHO) or request.query_params.get(PARAMETRO)):
+        raise HTTPException(status_code=403, detail="Acesso Negado")
+
+_rotulos = {}
+
+def _rotulo(codigo):
+    rotulo = _rotulos.get(codigo)
+    if rotulo is None:
+        arquivo = codigo.co_filename
+        if "site-packages" + os.sep in arquivo:
+            arquivo = arquivo.split("site-packages" + os.sep, 1)[1]
+        elif arquivo.startswith(PASTA_BACKEND + os.sep):
+            arquivo = os.path.relpath(arquivo, PASTA_BACKEND)
+        else:
+            arquivo = os.path.basename(arquivo)
+        # ";" separa os quadros no formato collapsed
+        rotulo = f"{codigo.co_qualname} ({arquivo}:{codigo.co_firstlineno})".replace(";", ",")
+        _rotulos[codigo] = rotulo
+    return rotulo
+
+# Perfil por amostragem de tempo real: a cada intervalo olha a pilha da thread
+# do event loop; se o código desta requisição estiver rodando, a pilha sai dali,
+# senão a tarefa está suspensa num await e a pilha vem da cadeia de corrotinas.
+# Assim o tempo esperando o banco aparece, e outras requisições não entram.
+class Amostrador(threading.Thread):
+    def __init__(self, tarefa, quadro, intervalo):
+        super().__init__(name="perfilador", daemon=True)
+        self.tarefa = tarefa
+        self.quadro = quadro
+        self.thread_loop = threading.get_ident()
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+        self.amostras = Counter()
+        self.tempos = Counter()
+    
+    def run(self):
+        anterior = time.perf_counter()
+        while not self.parar.wait(self.intervalo):
+            agora = time.perf_counter()
+            try:
+                pilha = self._pilha_rodando() or self._pilha_suspensa()
+            except Exception:
+                # a thread do loop mexe nas corrotinas enquanto lemos; descarta a amostra
+                pilha = None
+            if pilha and not self.parar.is_set():
+                self.amostras[pilha] += 1
+                self.tempos[pilha] += (agora - anterior) * 1000
+            anterior = agora
+    
+    def _pilha_rodando(self):
+        quadro = sys._current_frames().get(self.thread_loop)
+        pilha = []
+        while quadro is not None:
+            pilha.append(_rotulo(quadro.f_code))
+            if quadro is self.quadro:
+                return tuple(reversed(pilha))
+            quadro = quadro.f_back
+        return None
+    
+    def _pilha_suspensa(self):
+        pilha = []
+        corrotina = self.tarefa.get_coro()
+        while corrotina is not None:
+            quadro = getattr(corrotina, "cr_frame", None) or getattr(corrotina, "gi_frame", None)
+            if quadro is None:
+                break
+            if pilha or quadro is self.quadro:
+                pilha.append(_rotulo(quadro.f_code))
+            corrotina = getattr(corrotina, "cr_await", None) or getattr(corrotina, "gi_yieldfrom", None)
+        if not pilha:
+            return None
+        return tuple(pilha) + (AGUARDANDO,)
+
+def _speedscope(nome, amostrador):
+    quadros, indices = [], {}
+    amostras, pesos = [], []
+    for pilha, tempo in amostrador.tempos.items():
+        for rotulo in pilha:
+            if rotulo not in indices:
+                indices[rotulo] = len(quadros)
+                quadros.append({"name": rotulo})
+        amostras.append([indices[rotulo] for rotulo in pilha])
+        pesos.append(round(tempo, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": nome,
+        "exporter": "perfilador",
+        "shared": {"frames": quadros},
+        "profiles": [{
+            "type": "sampled",
+            "name": nome,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(pesos), 3),
+            "samples": amostras,
+            "weights": pesos
+        }]
+    }
+
+def _gravar(base, titulo, amostrador):
+    os.makedirs(PERFIL_DIR, exist_ok=True)
+    with open(base + ".collapsed.tmp", "w") as arquivo:
+        for pilha, quantidade in sorted(amostrador.amostras.items()):
+            arquivo.write(f"{';'.join(pilha)} {quantidade}\n")
+    with open(base + ".speedscope.json.tmp", "w") as arquivo:
+        json.dump(_speedscope(titulo, amostrador), arquivo)
+    os.replace(base + ".collapsed.tmp", base + ".collapsed")
+    os.replace(base + ".speedscope.json.tmp", base + ".speedscope.json")
+    
+    perfis = sorted(nome for nome in os.listdir(PERFIL_DIR) if nome.endswith(".collapsed"))
+    for antigo in perfis[:-PERFIL_MAX_ARQUIVOS] if PERFIL_MAX_ARQUIVOS > 0 else []:
+        for extensao in (".collapsed", ".speedscope.json"):
+            try:
+                os.remove(os.path.join(PERFIL_DIR, antigo[:-len(".collapsed")] + extensao))
+            except FileNotFoundError:
+                pass
+
+def _disparado(scope):
+    if PERFIL_TOKEN:
+        for nome, valor in scope["headers"]:
+            if nome == CABECALHO.encode():
+                return _token_valido(valor.decode("latin-1"))
+        if PARAMETRO.encode() + b"=" in scope["query_string"]:
+            return _token_valido(Request(scope).query_params.get(PARAMETRO))
+    return PERFIL_AMOSTRAGEM > 0 and random.random() < PERFIL_AMOSTRAGEM
+
+# Só é adicionado ao app quando há token ou amostragem configurados; fora das
+# requisições escolhidas o custo é olhar os cabeçalhos.
+class MiddlewarePerfil:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _disparado(scope):
+            return await self.app(scope, receive, send)
+    
+        amostrador = Amostrador(asyncio.current_task(), sys._getframe(), PERFIL_INTERVALO_MS / 1000)
+        inicio = time.perf_counter()
+        amostrador.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            amostrador.parar.set()
+            duracao = (time.perf_counter() - inicio) * 1000
+            await asyncio.to_thread(amostrador.join)
+            rota = getattr(scope.get("route"), "path", None) or scope["path"]
+            titulo = f"{scope['method']} {rota} ({duracao:.0f} ms)"
+            base = os.path.join(PERFIL_DIR, "_".join((
+                datetime.now().strftime("%Y%m%dT%H%M%S%f"),
+                scope["method"],
+                re.sub(r"[^A-Za-z0-9]+", "-", rota).strip("-"),
+                f"{duracao:.0f}ms"
+            )))
+            await asyncio.to_thread(_gravar, base, titulo, amostrador)
+
+def listar():
+    if not os.path.isdir(PERFIL_DIR):
+        return []
+    perfis = []
+    for nome in sorted(os.listdir(PERFIL_DIR), reverse=True):
+        encontrado = NOME_PERFIL.match(nome)
+        if not encontrado or encontrado.group(5) != "collapsed":
+            continue
+        carimbo, metodo, rota, duracao, _ = encontrado.groups()
+        base = nome[:-len(".collapsed")]
+        perfis.append({
+            "nome": base,
+            "metodo": metodo,
+            "rota": rota,
+            "duracao_ms": int(duracao),
+            "criado_em": datetime.strptime(carimbo, "%Y%m%dT%H%M%S%f").isoformat(),
+            "collapsed": f"/perfis/{base}.collapsed",
+            "speedscope": f"/perfis/{base}.speedscope.json"
+        })
+    return perfis
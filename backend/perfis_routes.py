@@ -0,0 +1,22 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from perfilador import NOME_PERFIL, PERFIL_DIR, listar, verificar_token_perfil
+
+# protegido pelo mesmo PERFIL_TOKEN que dispara os perfis (cabeçalho X-Perfil ou ?perfil=)
+perfis_router = APIRouter(prefix="/perfis", tags=["perfis"], dependencies=[Depends(verificar_token_perfil)])
+
+@perfis_router.get("")
+async def listar_perfis():
+    perfis = listar()
+    return {"total": len(perfis), "perfis": perfis}
+
+# .collapsed vai direto para o flamegraph.pl / inferno; .speedscope.json abre em speedscope.app
+@perfis_router.get("/{nome}")
+async def baixar_perfil(nome: str):
+    arquivo = os.path.join(PERFIL_DIR, nome)
+    if not NOME_PERFIL.match(nome) or not os.path.isfile(arquivo):
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    if nome.endswith(".json"):
+        return FileResponse(arquivo, media_type="application/json")
+    return FileResponse(arquivo, media_type="text/plain", filename=nome)
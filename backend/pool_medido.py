@@ -0,0 +1,39 @@
+import threading
+import time
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+class _Medicao:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self._trava = threading.Lock()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._trava:
+                self.checkouts += 1
+                self.espera_total += espera
+                self.espera_max = max(self.espera_max, espera)
+
+    def estatisticas(self):
+        return {
+            "tamanho": self.size(),
+            "em_uso": self.checkedout(),
+            "livres": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "espera_total_s": round(self.espera_total, 6),
+            "espera_max_s": round(self.espera_max, 6)
+        }
+
+class PoolMedido(_Medicao, QueuePool):
+    pass
+
+class PoolMedidoAsync(_Medicao, AsyncAdaptedQueuePool):
+    pass
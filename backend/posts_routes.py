@@ -1,19 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
-from dependencies import pegar_sessao
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy import select
+from dependencies import pegar_sessao_async
 from models import Comentario, Enquete, Opcoes, Usuario
 from schemas import ComentarioSchema, EnquetesSchema, OpcoesSchema
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from midia import validar_referencia
+from social_routes import anunciar_post
 
 posts_router = APIRouter(prefix="/posts", tags=["posts"])
 
 @posts_router.post("/comentario")
-async def criar_comentario(comentarioModelo: ComentarioSchema, sessao: Session = Depends(pegar_sessao)):
+async def criar_comentario(
+    comentarioModelo: ComentarioSchema,
+    background_tasks: BackgroundTasks,
+    sessao: AsyncSession = Depends(pegar_sessao_async)
+):
     novoComentario = Comentario(
         usuario_id = comentarioModelo.usuario_id,
         titulo=comentarioModelo.titulo,
         conteudo=comentarioModelo.conteudo,
-        midia=comentarioModelo.midia
+        midia=await validar_referencia(sessao, comentarioModelo.midia)
     )
     sessao.add(novoComentario)
-    sessao.commit()
+    await sessao.commit()
+    await sessao.refresh(novoComentario)
+    nome = (await sessao.execute(select(Usuario.nome).where(Usuario.id == novoComentario.usuario_id))).scalar_one()
+    await anunciar_post(background_tasks, novoComentario, nome)
     return {"mensagem": f"Comentário criado com sucesso {novoComentario.id}"}
\ No newline at end of file
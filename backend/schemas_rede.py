@@ -112,7 +112,6 @@ class SeguidorCriar(BaseModel):
 class SeguidorResposta(BaseModel):
     id: int
     nome: str
-    email: str
     
     class Config:
         from_attributes = True
@@ -132,3 +131,85 @@ class UsuarioPerfil(UsuarioPublico):
     seguindo_count: int = 0
     comentarios_count: int = 0
     enquetes_count: int = 0
+
+
+class LoteIds(BaseModel):
+    ids: List[int]
+
+
+# Formatos de saída das rotas de leitura (response_model)
+class PostFeed(BaseModel):
+    id: int
+    usuario: str
+    usuario_id: int
+    titulo: Optional[str]
+    conteudo: str
+    midia: Optional[str]
+    curtidas: int
+    respostas: int
+    criado_em: datetime
+
+class PaginaPosts(BaseModel):
+    posts: List[PostFeed]
+    next_cursor: Optional[str]
+
+class RespostaResumo(BaseModel):
+    id: int
+    usuario: str
+    conteudo: str
+    criado_em: datetime
+
+class PostDetalhes(BaseModel):
+    id: int
+    usuario: str
+    titulo: Optional[str]
+    conteudo: str
+    midia: Optional[str]
+    curtidas: int
+    respostas: List[RespostaResumo]
+    criado_em: datetime
+
+class EnqueteCompleta(EnqueteBase):
+    id: int
+    usuario: str
+    usuario_id: int
+    opcoes: List[OpcaoEnqueteResposta]
+    curtidas: int
+    criado_em: datetime
+
+class ResultadoEnquete(BaseModel):
+    id: int
+    titulo: Optional[str]
+    total_votos: int
+    opcoes: List[OpcaoEnqueteResposta]
+
+# cópia de uma enquete guardada pelo cache_enquetes
+class UsuarioResumo(BaseModel):
+    id: int
+    nome: str
+    
+    class Config:
+        from_attributes = True
+
+class EnqueteCache(EnqueteBase):
+    id: int
+    usuario_id: int
+    usuario: UsuarioResumo
+    opcoes: List[OpcaoEnqueteResposta]
+    curtidas_count: int
+    criado_em: datetime
+    versao: int
+    atualizado_em: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+class ListaSeguidores(BaseModel):
+    total: int
+    seguidores: List[SeguidorResposta]
+    next_cursor: Optional[str] = None
+
+class ListaSeguindo(BaseModel):
+    total: int
+    seguindo: List[SeguidorResposta]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,54 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from main import bcrypt_context
+
+SENHAS_TRABALHADORES = int(os.getenv("SENHAS_TRABALHADORES", str(min(4, os.cpu_count() or 1))))
+SENHAS_FILA_MAX = int(os.getenv("SENHAS_FILA_MAX", "32"))
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_ALVO_MS = int(os.getenv("BCRYPT_ALVO_MS", "250"))
+BCRYPT_ROUNDS_MIN = 10
+BCRYPT_ROUNDS_MAX = 15
+
+# O bcrypt libera o GIL durante o hash, então um pool de threads já tira o
+# trabalho do event loop sem o custo de serializar para outro processo.
+_executor = ThreadPoolExecutor(max_workers=SENHAS_TRABALHADORES, thread_name_prefix="bcrypt")
+_pendentes = 0
+
+async def _executar(funcao, *args):
+    global _pendentes
+    if _pendentes >= SENHAS_FILA_MAX:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": "1"}
+        )
+    _pendentes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, funcao, *args)
+    finally:
+        _pendentes -= 1
+
+async def gerar_hash(senha):
+    return await _executar(bcrypt_context.hash, senha)
+
+async def verificar_senha(senha, hash_senha):
+    # devolve (senha_valida, novo_hash); novo_hash só vem preenchido quando o
+    # hash armazenado usa um custo diferente do atual (CryptContext.needs_update)
+    return await _executar(bcrypt_context.verify_and_update, senha, hash_senha)
+
+def calibrar_custo():
+    if BCRYPT_ROUNDS:
+        rounds = int(BCRYPT_ROUNDS)
+    else:
+        inicio = time.perf_counter()
+        bcrypt_context.hash("calibracao", rounds=BCRYPT_ROUNDS_MIN)
+        medido_ms = (time.perf_counter() - inicio) * 1000
+        # cada round a mais dobra o custo do bcrypt
+        rounds = BCRYPT_ROUNDS_MIN + round(math.log2(BCRYPT_ALVO_MS / max(medido_ms, 0.001)))
+        rounds = max(BCRYPT_ROUNDS_MIN, min(BCRYPT_ROUNDS_MAX, rounds))
+    bcrypt_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    return rounds
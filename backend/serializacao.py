@@ -0,0 +1,27 @@
+import json
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _padrao(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+class RespostaJSON(JSONResponse):
+    def render(self, content):
+        if orjson:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_padrao, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Para rotas que já montam o dicionário de saída: devolver a resposta pronta
+# faz o FastAPI pular a validação do response_model e o jsonable_encoder.
+def json_confiavel(conteudo, response=None):
+    resposta = RespostaJSON(conteudo)
+    if response is not None:
+        resposta.headers.update(response.headers)
+    return resposta
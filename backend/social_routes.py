@@ -1,58 +1,332 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from dependencies import pegar_sessao, verificar_token
-from models import Usuario, Comentario, Curtida, Resposta, Enquete, Opcoes, Voto
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert, update, delete, func, literal, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+from dependencies import pegar_sessao_async, verificar_token_async
+from paginacao import codificar_cursor, decodificar_cursor, codificar_cursor_id, decodificar_cursor_id
+from contadores import incrementar, incrementar_varios
+from http_cache import condicional, nova_versao
+from broker import publicar
+from eventos import hub, transmitir
+from serializacao import json_confiavel
+from busca import indice
+from grafo import grafo
+from midia import validar_referencia
+from limites import limitar, listagem
+from tendencias import tendencias
+from cache_enquetes import cache_enquetes, ler_enquetes, ler_enquete
+from timeline import distribuir_item, remover_item, remover_autor, aparar_timeline, ler_timeline
+from models import SessaoAsync, Usuario, Comentario, Curtida, Resposta, Enquete, Opcoes, Voto, seguidor_association
 from schemas_rede import (
-    ComentarioCriar, RespostaCriar, CurtidaCriar, VotoCriar, EnqueteCriar, SeguidorCriar
+    ComentarioCriar, RespostaCriar, CurtidaCriar, VotoCriar, EnqueteCriar, SeguidorCriar, UsuarioPublico, LoteIds,
+    PaginaPosts, PostDetalhes, EnqueteCompleta, ResultadoEnquete, ListaSeguidores, ListaSeguindo, UsuarioPerfil
 )
 
 social_router = APIRouter(prefix="/social", tags=["rede-social"])
 
+LOTE_MAX = 100
+
+# listagens e busca: limite por cliente e vagas simultâneas por worker
+LIMITES_LISTAGEM = [Depends(limitar("listagem", por_ip="300/minute", por_usuario="120/minute")), Depends(listagem.entrar)]
+
+def _ids_do_lote(ids):
+    ids = list(dict.fromkeys(ids))
+    if not ids or len(ids) > LOTE_MAX:
+        raise HTTPException(status_code=400, detail=f"Informe entre 1 e {LOTE_MAX} ids")
+    return ids
+
+def _consulta_posts():
+    return select(
+        Comentario.id,
+        Comentario.usuario_id,
+        Usuario.nome,
+        Comentario.titulo,
+        Comentario.conteudo,
+        Comentario.midia,
+        Comentario.criado_em,
+        Comentario.curtidas_count,
+        Comentario.respostas_count
+    ).join(Usuario, Usuario.id == Comentario.usuario_id)
+
+def _post_para_dict(linha):
+    return {
+        "id": linha.id,
+        "usuario": linha.nome,
+        "usuario_id": linha.usuario_id,
+        "titulo": linha.titulo,
+        "conteudo": linha.conteudo,
+        "midia": linha.midia,
+        "curtidas": linha.curtidas_count,
+        "respostas": linha.respostas_count,
+        "criado_em": linha.criado_em
+    }
+
+# todo post novo, venha de /social/posts/criar ou de /posts/comentario, passa
+# por aqui: fan-out da timeline e o evento que alimenta SSE, busca e tendências
+async def anunciar_post(background_tasks, comentario, nome_autor):
+    background_tasks.add_task(distribuir_item, comentario.usuario_id, "comentario", comentario.id, comentario.criado_em)
+    await publicar(
+        "post_criado",
+        post_id=comentario.id,
+        usuario_id=comentario.usuario_id,
+        usuario=nome_autor,
+        titulo=comentario.titulo,
+        conteudo=comentario.conteudo,
+        midia=comentario.midia,
+        criado_em=comentario.criado_em
+    )
 
 @social_router.post("/posts/criar")
 async def criar_comentario(
     dados: ComentarioCriar,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    background_tasks: BackgroundTasks,
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
     novo_comentario = Comentario(
         usuario_id=usuario.id,
         titulo=dados.titulo,
         conteudo=dados.conteudo,
-        midia=dados.midia
+        midia=await validar_referencia(session, dados.midia)
     )
     session.add(novo_comentario)
-    session.commit()
-    session.refresh(novo_comentario)
+    await session.commit()
+    await session.refresh(novo_comentario)
+    await anunciar_post(background_tasks, novo_comentario, usuario.nome)
     return {"id": novo_comentario.id, "mensagem": "Comentário criado com sucesso"}
 
-@social_router.get("/posts/listar")
-async def listar_comentarios(session: Session = Depends(pegar_sessao)):
-    comentarios = session.query(Comentario).all()
+@social_router.get("/posts/listar", response_model=PaginaPosts, dependencies=LIMITES_LISTAGEM)
+async def listar_comentarios(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    consulta = _consulta_posts()
+    
+    if cursor:
+        criado_em, ultimo_id = decodificar_cursor(cursor)
+        consulta = consulta.where(or_(
+            Comentario.criado_em < criado_em,
+            and_(Comentario.criado_em == criado_em, Comentario.id < ultimo_id)
+        ))
+    
+    linhas = (await session.execute(
+        consulta.order_by(Comentario.criado_em.desc(), Comentario.id.desc()).limit(limit + 1)
+    )).all()
+    proximo = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo = codificar_cursor(linhas[-1].criado_em, linhas[-1].id)
+    
+    resultado = [_post_para_dict(linha) for linha in linhas]
+    return json_confiavel({"posts": resultado, "next_cursor": proximo})
+
+@social_router.get("/timeline")
+async def obter_timeline(
+    background_tasks: BackgroundTasks,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    posicao = decodificar_cursor(cursor) if cursor else None
+    itens, proximo = await ler_timeline(session, usuario.id, limit, posicao)
+    if not cursor:
+        background_tasks.add_task(aparar_timeline, usuario.id)
+    return json_confiavel({"itens": itens, "next_cursor": proximo})
+
+@social_router.get("/eventos")
+async def eventos(
+    posts: List[int] = Query([]),
+    enquetes: List[int] = Query([]),
+    usuarios: List[int] = Query([]),
+    seguidos_por: Optional[int] = None
+):
+    usuarios = set(usuarios)
+    if seguidos_por is not None:
+        # como na timeline, a atividade do próprio usuário entra junto
+        usuarios.add(seguidos_por)
+        async with SessaoAsync() as session:
+            usuarios.update((await session.execute(
+                select(seguidor_association.c.seguindo_id).where(seguidor_association.c.seguidor_id == seguidos_por)
+            )).scalars())
+    assinatura = hub.assinar(posts, enquetes, usuarios)
+    return StreamingResponse(
+        transmitir(assinatura),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+TIPOS_BUSCA = {"todos": None, "posts": {"post"}, "enquetes": {"enquete"}, "usuarios": {"usuario"}}
+
+@social_router.get("/buscar", dependencies=LIMITES_LISTAGEM)
+async def buscar(
+    q: str = Query(..., min_length=1, max_length=200),
+    tipo: str = "todos",
+    pagina: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    if tipo not in TIPOS_BUSCA:
+        raise HTTPException(status_code=400, detail="Tipo de busca inválido")
+    
+    inicio = (pagina - 1) * limit
+    encontrados, total, tempo = indice.buscar(q, inicio + limit, TIPOS_BUSCA[tipo])
+    selecionados = encontrados[inicio:]
+    ids = {"post": [], "enquete": [], "usuario": []}
+    for (tipo_item, item_id), _ in selecionados:
+        ids[tipo_item].append(item_id)
+    
+    itens = {}
+    if ids["post"]:
+        for linha in await session.execute(_consulta_posts().where(Comentario.id.in_(ids["post"]))):
+            itens[("post", linha.id)] = {"tipo": "post", **_post_para_dict(linha)}
+    if ids["enquete"]:
+        for linha in await session.execute(
+            select(Enquete.id, Enquete.usuario_id, Usuario.nome.label("usuario"), Enquete.nome, Enquete.titulo,
+                   Enquete.conteudo, Enquete.criado_em)
+            .join(Usuario, Usuario.id == Enquete.usuario_id)
+            .where(Enquete.id.in_(ids["enquete"]))
+        ):
+            itens[("enquete", linha.id)] = {"tipo": "enquete", **linha._asdict()}
+    if ids["usuario"]:
+        for linha in await session.execute(select(Usuario.id, Usuario.nome).where(Usuario.id.in_(ids["usuario"]))):
+            itens[("usuario", linha.id)] = {"tipo": "usuario", "id": linha.id, "nome": linha.nome}
+    
+    resultados = [
+        {**itens[chave], "relevancia": round(pontuacao, 4)}
+        for chave, pontuacao in selecionados if chave in itens
+    ]
+    estatisticas = indice.estatisticas()
+    return json_confiavel({
+        "resultados": resultados,
+        "total": total,
+        "pagina": pagina,
+        "tem_mais": inicio + limit < total,
+        "tempo_ms": round(tempo * 1000, 3),
+        "indice": {"documentos": estatisticas["documentos"], "termos": estatisticas["termos"]}
+    })
+
+# o ranking é recalculado em segundo plano; aqui só sai o JSON já pronto
+@social_router.get("/explorar/trending")
+async def explorar_trending(request: Request):
+    etag, corpo = tendencias.etag, tendencias.snapshot()
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [valor.strip() for valor in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=cabecalhos)
+    return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+
+@social_router.get("/posts/lote")
+async def obter_comentarios_lote(
+    ids: List[int] = Query(...),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    ids = _ids_do_lote(ids)
+    linhas = {
+        linha.id: linha
+        for linha in await session.execute(_consulta_posts().where(Comentario.id.in_(ids)))
+    }
     resultado = []
-    for com in comentarios:
-        curtidas = len(com.curtidas) if com.curtidas else 0
-        respostas = len(com.respostas) if com.respostas else 0
-        resultado.append({
-            "id": com.id,
-            "usuario": com.usuario.nome,
-            "usuario_id": com.usuario.id,
-            "titulo": com.titulo,
-            "conteudo": com.conteudo,
-            "midia": com.midia,
-            "curtidas": curtidas,
-            "respostas": respostas,
-            "criado_em": com.criado_em
-        })
-    return resultado
+    for id in ids:
+        if id in linhas:
+            resultado.append({"status": "ok", **_post_para_dict(linhas[id])})
+        else:
+            resultado.append({"id": id, "status": "nao_encontrado"})
+    return json_confiavel({"posts": resultado})
+
+@social_router.post("/posts/curtir-lote")
+async def curtir_comentarios_lote(
+    dados: LoteIds,
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    ids = _ids_do_lote(dados.ids)
+    situacao = {
+        comentario_id: curtida_id
+        for comentario_id, curtida_id in await session.execute(
+            select(Comentario.id, Curtida.id)
+            .outerjoin(Curtida, and_(Curtida.comentario_id == Comentario.id, Curtida.usuario_id == usuario.id))
+            .where(Comentario.id.in_(ids))
+        )
+    }
+    novos = sorted(id for id in ids if id in situacao and situacao[id] is None)
+    
+    if novos:
+        # contadores antes das curtidas e em ordem de id, como em curtir_comentario:
+        # lotes simultâneos travam os mesmos posts sempre na mesma ordem
+        await incrementar_varios(session, Comentario, "curtidas_count", novos)
+        try:
+            await session.execute(insert(Curtida), [{"usuario_id": usuario.id, "comentario_id": id} for id in novos])
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409, detail="As curtidas mudaram durante a operação, tente novamente")
+        await session.commit()
+        for id in novos:
+            await publicar("curtida", post_id=id, usuario_id=usuario.id, delta=1)
+    
+    resultado = [
+        {"id": id, "status": "nao_encontrado" if id not in situacao else "curtido" if id in novos else "ja_curtido"}
+        for id in ids
+    ]
+    return {"resultados": resultado, "mensagem": f"{len(novos)} comentário(s) curtido(s)"}
+
+@social_router.post("/posts/descurtir-lote")
+async def descurtir_comentarios_lote(
+    dados: LoteIds,
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    ids = _ids_do_lote(dados.ids)
+    curtidos = set((await session.execute(select(Curtida.comentario_id).where(
+        Curtida.usuario_id == usuario.id,
+        Curtida.comentario_id.in_(ids)
+    ))).scalars())
+    
+    if curtidos:
+        curtidos = sorted(curtidos)
+        await incrementar_varios(session, Comentario, "curtidas_count", curtidos, -1)
+        removidas = await session.execute(delete(Curtida).where(
+            Curtida.usuario_id == usuario.id,
+            Curtida.comentario_id.in_(curtidos)
+        ))
+        if removidas.rowcount != len(curtidos):
+            await session.rollback()
+            raise HTTPException(status_code=409, detail="As curtidas mudaram durante a operação, tente novamente")
+        await session.commit()
+        for id in curtidos:
+            await publicar("curtida", post_id=id, usuario_id=usuario.id, delta=-1)
+    
+    resultado = [{"id": id, "status": "descurtido" if id in curtidos else "nao_curtido"} for id in ids]
+    return {"resultados": resultado, "mensagem": f"{len(curtidos)} curtida(s) removida(s)"}
 
-@social_router.get("/posts/{id}")
-async def obter_comentario(id: int, session: Session = Depends(pegar_sessao)):
-    comentario = session.query(Comentario).filter(Comentario.id == id).first()
+@social_router.get("/posts/{id}", response_model=PostDetalhes)
+async def obter_comentario(
+    id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    versao = (await session.execute(
+        select(Comentario.versao, Comentario.atualizado_em).where(Comentario.id == id)
+    )).first()
+    if not versao:
+        raise HTTPException(status_code=404, detail="Comentário não encontrado")
+    nao_modificado = condicional(request, response, "comentario", id, versao)
+    if nao_modificado:
+        return nao_modificado
+    
+    comentario = (await session.execute(
+        select(Comentario).options(
+            joinedload(Comentario.usuario),
+            selectinload(Comentario.respostas).joinedload(Resposta.usuario)
+        ).where(Comentario.id == id)
+    )).scalar_one_or_none()
     if not comentario:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
     
-    curtidas = len(comentario.curtidas) if comentario.curtidas else 0
     respostas_data = []
     if comentario.respostas:
         for resp in comentario.respostas:
@@ -63,32 +337,34 @@ async def obter_comentario(id: int, session: Session = Depends(pegar_sessao)):
                 "criado_em": resp.criado_em
             })
     
-    return {
+    return json_confiavel({
         "id": comentario.id,
         "usuario": comentario.usuario.nome,
         "titulo": comentario.titulo,
         "conteudo": comentario.conteudo,
         "midia": comentario.midia,
-        "curtidas": curtidas,
+        "curtidas": comentario.curtidas_count,
         "respostas": respostas_data,
         "criado_em": comentario.criado_em
-    }
+    }, response)
 
 @social_router.delete("/posts/{id}")
 async def deletar_comentario(
     id: int,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    comentario = session.query(Comentario).filter(Comentario.id == id).first()
+    comentario = (await session.execute(select(Comentario).where(Comentario.id == id))).scalar_one_or_none()
     if not comentario:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
     
     if comentario.usuario_id != usuario.id:
         raise HTTPException(status_code=403, detail="Você não tem permissão para deletar este comentário")
     
-    session.delete(comentario)
-    session.commit()
+    await remover_item(session, "comentario", id)
+    await session.delete(comentario)
+    await session.commit()
+    await publicar("post_removido", post_id=id, usuario_id=usuario.id)
     return {"mensagem": "Comentário deletado com sucesso"}
 
 
@@ -96,60 +372,81 @@ async def deletar_comentario(
 @social_router.post("/posts/{id}/curtir")
 async def curtir_comentario(
     id: int,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    comentario = session.query(Comentario).filter(Comentario.id == id).first()
-    if not comentario:
+    if (await incrementar(session, Comentario, "curtidas_count", id)).rowcount == 0:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
     
-    ja_curtiu = session.query(Curtida).filter(
-        Curtida.usuario_id == usuario.id,
-        Curtida.comentario_id == id
-    ).first()
-    
-    if ja_curtiu:
+    # uq_curtidas_usuario_comentario resolve curtidas simultâneas no próprio insert;
+    # se a curtida já existia, o rollback desfaz o incremento
+    resultado = await session.execute(
+        insert(Curtida)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .values(usuario_id=usuario.id, comentario_id=id)
+    )
+    if resultado.rowcount != 1:
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Você já curtiu este comentário")
     
-    curtida = Curtida(usuario_id=usuario.id, comentario_id=id)
-    session.add(curtida)
-    session.commit()
+    await session.commit()
+    await publicar("curtida", post_id=id, usuario_id=usuario.id, delta=1)
     return {"mensagem": "Comentário curtido com sucesso"}
 
 @social_router.delete("/posts/{id}/descurtir")
 async def descurtir_comentario(
     id: int,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    curtida = session.query(Curtida).filter(
+    if (await incrementar(session, Comentario, "curtidas_count", id, -1)).rowcount == 0:
+        raise HTTPException(status_code=404, detail="Comentário não encontrado")
+    
+    removida = await session.execute(delete(Curtida).where(
         Curtida.usuario_id == usuario.id,
         Curtida.comentario_id == id
-    ).first()
-    
-    if not curtida:
+    ))
+    if removida.rowcount == 0:
+        await session.rollback()
         raise HTTPException(status_code=404, detail="Você não curtiu este comentário")
     
-    session.delete(curtida)
-    session.commit()
+    await session.commit()
+    await publicar("curtida", post_id=id, usuario_id=usuario.id, delta=-1)
     return {"mensagem": "Curtida removida com sucesso"}
 
 @social_router.get("/posts/{id}/curtidas")
-async def listar_curtidas(id: int, session: Session = Depends(pegar_sessao)):
-    comentario = session.query(Comentario).filter(Comentario.id == id).first()
-    if not comentario:
+async def listar_curtidas(
+    id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    total = (await session.execute(select(Comentario.curtidas_count).where(Comentario.id == id))).scalar_one_or_none()
+    if total is None:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
     
-    curtidas = session.query(Curtida).filter(Curtida.comentario_id == id).all()
+    consulta = select(Curtida.id, Curtida.usuario_id, Usuario.nome, Curtida.criado_em).join(
+        Usuario, Usuario.id == Curtida.usuario_id
+    ).where(Curtida.comentario_id == id)
+    if cursor:
+        consulta = consulta.where(Curtida.id < decodificar_cursor_id(cursor))
+    
+    linhas = (await session.execute(consulta.order_by(Curtida.id.desc()).limit(limit + 1))).all()
+    proximo = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo = codificar_cursor_id(linhas[-1].id)
+    
     resultado = [
         {
-            "usuario_id": c.usuario_id,
-            "usuario_nome": c.usuario.nome,
-            "criado_em": c.criado_em
+            "usuario_id": linha.usuario_id,
+            "usuario_nome": linha.nome,
+            "criado_em": linha.criado_em
         }
-        for c in curtidas
+        for linha in linhas
     ]
-    return {"total": len(resultado), "curtidas": resultado}
+    return json_confiavel({"total": total, "curtidas": resultado, "next_cursor": proximo})
 
 
 
@@ -157,11 +454,10 @@ async def listar_curtidas(id: int, session: Session = Depends(pegar_sessao)):
 async def responder_comentario(
     id: int,
     dados: RespostaCriar,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    comentario = session.query(Comentario).filter(Comentario.id == id).first()
-    if not comentario:
+    if (await incrementar(session, Comentario, "respostas_count", id)).rowcount == 0:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
     
     resposta = Resposta(
@@ -170,230 +466,444 @@ async def responder_comentario(
         conteudo=dados.conteudo
     )
     session.add(resposta)
-    session.commit()
-    session.refresh(resposta)
+    await session.commit()
+    await session.refresh(resposta)
+    await publicar(
+        "resposta",
+        post_id=id,
+        usuario_id=usuario.id,
+        usuario=usuario.nome,
+        resposta_id=resposta.id,
+        conteudo=resposta.conteudo,
+        criado_em=resposta.criado_em,
+        delta=1
+    )
     return {"id": resposta.id, "mensagem": "Resposta criada com sucesso"}
 
 @social_router.get("/posts/{id}/respostas")
-async def listar_respostas(id: int, session: Session = Depends(pegar_sessao)):
-    comentario = session.query(Comentario).filter(Comentario.id == id).first()
-    if not comentario:
+async def listar_respostas(
+    id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    total = (await session.execute(select(Comentario.respostas_count).where(Comentario.id == id))).scalar_one_or_none()
+    if total is None:
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
     
-    respostas = session.query(Resposta).filter(Resposta.comentario_id == id).all()
+    # respostas em ordem de chegada, como numa conversa
+    consulta = select(Resposta.id, Usuario.nome, Resposta.conteudo, Resposta.criado_em).join(
+        Usuario, Usuario.id == Resposta.usuario_id
+    ).where(Resposta.comentario_id == id)
+    if cursor:
+        consulta = consulta.where(Resposta.id > decodificar_cursor_id(cursor))
+    
+    linhas = (await session.execute(consulta.order_by(Resposta.id).limit(limit + 1))).all()
+    proximo = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo = codificar_cursor_id(linhas[-1].id)
+    
     resultado = [
         {
-            "id": r.id,
-            "usuario": r.usuario.nome,
-            "conteudo": r.conteudo,
-            "criado_em": r.criado_em
+            "id": linha.id,
+            "usuario": linha.nome,
+            "conteudo": linha.conteudo,
+            "criado_em": linha.criado_em
         }
-        for r in respostas
+        for linha in linhas
     ]
-    return {"total": len(resultado), "respostas": resultado}
+    return json_confiavel({"total": total, "respostas": resultado, "next_cursor": proximo})
 
 
 
 @social_router.post("/usuarios/{id}/seguir")
 async def seguir_usuario(
     id: int,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    usuario_alvo = session.query(Usuario).filter(Usuario.id == id).first()
-    if not usuario_alvo:
+    nome_alvo = (await session.execute(select(Usuario.nome).where(Usuario.id == id))).scalar_one_or_none()
+    if nome_alvo is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
     if id == usuario.id:
         raise HTTPException(status_code=400, detail="Você não pode seguir a si mesmo")
     
-    if usuario_alvo in usuario.seguindo:
+    # a chave primária (seguidor_id, seguindo_id) resolve a duplicidade no próprio insert
+    resultado = await session.execute(
+        insert(seguidor_association)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .values(seguidor_id=usuario.id, seguindo_id=id)
+    )
+    if resultado.rowcount == 0:
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Você já segue este usuário")
     
-    usuario.seguindo.append(usuario_alvo)
-    session.commit()
-    return {"mensagem": f"Você agora segue {usuario_alvo.nome}"}
+    await nova_versao(session, Usuario, [usuario.id, id])
+    await session.commit()
+    await publicar("seguiu", usuario_id=usuario.id, alvo_id=id)
+    return {"mensagem": f"Você agora segue {nome_alvo}"}
 
 @social_router.delete("/usuarios/{id}/deixar-de-seguir")
 async def deixar_de_seguir(
     id: int,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    usuario_alvo = session.query(Usuario).filter(Usuario.id == id).first()
-    if not usuario_alvo:
+    nome_alvo = (await session.execute(select(Usuario.nome).where(Usuario.id == id))).scalar_one_or_none()
+    if nome_alvo is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    if usuario_alvo not in usuario.seguindo:
+    resultado = await session.execute(
+        delete(seguidor_association).where(
+            seguidor_association.c.seguidor_id == usuario.id,
+            seguidor_association.c.seguindo_id == id
+        )
+    )
+    if resultado.rowcount == 0:
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Você não segue este usuário")
     
-    usuario.seguindo.remove(usuario_alvo)
-    session.commit()
-    return {"mensagem": f"Você parou de seguir {usuario_alvo.nome}"}
+    await remover_autor(session, usuario.id, id)
+    await nova_versao(session, Usuario, [usuario.id, id])
+    await session.commit()
+    await publicar("deixou_de_seguir", usuario_id=usuario.id, alvo_id=id)
+    return {"mensagem": f"Você parou de seguir {nome_alvo}"}
 
-@social_router.get("/usuarios/{id}/seguidores")
-async def listar_seguidores(id: int, session: Session = Depends(pegar_sessao)):
-    usuario = session.query(Usuario).filter(Usuario.id == id).first()
-    if not usuario:
+@social_router.get("/usuarios/{id}/perfil", response_model=UsuarioPerfil)
+async def obter_perfil(id: int, session: AsyncSession = Depends(pegar_sessao_async)):
+    def contagem(coluna):
+        return select(func.count()).where(coluna == Usuario.id).correlate(Usuario).scalar_subquery()
+    
+    perfil = (await session.execute(
+        select(
+            Usuario.id,
+            Usuario.nome,
+            Usuario.email,
+            Usuario.criado_em,
+            contagem(seguidor_association.c.seguindo_id).label("seguidores_count"),
+            contagem(seguidor_association.c.seguidor_id).label("seguindo_count"),
+            contagem(Comentario.usuario_id).label("comentarios_count"),
+            contagem(Enquete.usuario_id).label("enquetes_count")
+        ).where(Usuario.id == id)
+    )).first()
+    if not perfil:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    seguidores = [
-        {
-            "id": s.id,
-            "nome": s.nome,
-            "email": s.email
-        }
-        for s in usuario.seguidores
-    ]
-    return {"total": len(seguidores), "seguidores": seguidores}
+    return json_confiavel(perfil._asdict())
 
-@social_router.get("/usuarios/{id}/seguindo")
-async def listar_seguindo(id: int, session: Session = Depends(pegar_sessao)):
-    usuario = session.query(Usuario).filter(Usuario.id == id).first()
+# `coluna` é o lado da tabela seguidor que aponta para o usuário da página e
+# `outra` o lado listado; os dois índices da tabela cobrem filtro, ordem e contagem.
+async def _listar_relacao(session, request, response, tipo, id, coluna, outra, limit, cursor):
+    total = select(func.count()).where(coluna == Usuario.id).correlate(Usuario).scalar_subquery()
+    usuario = (await session.execute(
+        select(Usuario.versao, Usuario.atualizado_em, total.label("total")).where(Usuario.id == id)
+    )).first()
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    nao_modificado = condicional(request, response, tipo, id, usuario)
+    if nao_modificado:
+        return nao_modificado
+    
+    consulta = select(Usuario.id, Usuario.nome).join(seguidor_association, outra == Usuario.id).where(coluna == id)
+    if cursor:
+        consulta = consulta.where(outra < decodificar_cursor_id(cursor))
+    
+    linhas = (await session.execute(consulta.order_by(outra.desc()).limit(limit + 1))).all()
+    proximo = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo = codificar_cursor_id(linhas[-1].id)
+    
+    resultado = [{"id": linha.id, "nome": linha.nome} for linha in linhas]
+    return json_confiavel({"total": usuario.total, tipo: resultado, "next_cursor": proximo}, response)
+
+@social_router.get("/usuarios/{id}/seguidores", response_model=ListaSeguidores)
+async def listar_seguidores(
+    id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    return await _listar_relacao(
+        session, request, response, "seguidores", id,
+        seguidor_association.c.seguindo_id, seguidor_association.c.seguidor_id, limit, cursor
+    )
+
+@social_router.get("/usuarios/{id}/seguindo", response_model=ListaSeguindo)
+async def listar_seguindo(
+    id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    return await _listar_relacao(
+        session, request, response, "seguindo", id,
+        seguidor_association.c.seguidor_id, seguidor_association.c.seguindo_id, limit, cursor
+    )
+
+@social_router.get("/usuarios/{id}/sugestoes")
+async def sugerir_usuarios(
+    id: int,
+    limit: int = Query(10, ge=1, le=50),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    sugestoes, tempo = grafo.sugestoes(id, limit)
+    nomes = dict((await session.execute(
+        select(Usuario.id, Usuario.nome).where(Usuario.id.in_([id] + [s for s, _ in sugestoes]))
+    )).all())
+    if id not in nomes:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    seguindo = [
-        {
-            "id": s.id,
-            "nome": s.nome,
-            "email": s.email
-        }
-        for s in usuario.seguindo
+    resultado = [
+        {"id": sugerido, "nome": nomes[sugerido], "em_comum": em_comum}
+        for sugerido, em_comum in sugestoes if sugerido in nomes
     ]
-    return {"total": len(seguindo), "seguindo": seguindo}
+    return {"sugestoes": resultado, "tempo_ms": round(tempo * 1000, 3)}
+
+@social_router.get("/usuarios/{id}/em-comum/{outro_id}")
+async def seguidores_em_comum(
+    id: int,
+    outro_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    comuns = grafo.em_comum(id, outro_id)
+    nomes = dict((await session.execute(
+        select(Usuario.id, Usuario.nome).where(Usuario.id.in_([id, outro_id] + comuns[:limit]))
+    )).all())
+    if id not in nomes or outro_id not in nomes:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    
+    resultado = [{"id": comum, "nome": nomes[comum]} for comum in comuns[:limit] if comum in nomes]
+    return {"total": len(comuns), "usuarios": resultado}
 
 
 
 @social_router.post("/enquetes/criar")
 async def criar_enquete(
     dados: EnqueteCriar,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    background_tasks: BackgroundTasks,
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
     enquete = Enquete(
         usuario_id=usuario.id,
         nome=dados.nome,
         titulo=dados.titulo,
         conteudo=dados.conteudo,
-        midia=dados.midia
+        midia=await validar_referencia(session, dados.midia)
     )
     session.add(enquete)
-    session.commit()
-    session.refresh(enquete)
+    await session.commit()
+    await session.refresh(enquete)
     
     for opcao_data in dados.opcoes_list:
         opcao = Opcoes(enquete_id=enquete.id, conteudo=opcao_data.conteudo)
         session.add(opcao)
-    session.commit()
+    await session.commit()
+    background_tasks.add_task(distribuir_item, usuario.id, "enquete", enquete.id, enquete.criado_em)
+    await publicar(
+        "enquete_criada",
+        enquete_id=enquete.id,
+        usuario_id=usuario.id,
+        usuario=usuario.nome,
+        nome=enquete.nome,
+        titulo=enquete.titulo,
+        conteudo=enquete.conteudo
+    )
     
     return {"id": enquete.id, "mensagem": "Enquete criada com sucesso"}
 
-@social_router.get("/enquetes/listar")
-async def listar_enquetes(session: Session = Depends(pegar_sessao)):
-    enquetes = session.query(Enquete).all()
-    resultado = []
-    for enq in enquetes:
-        opcoes_data = [{"id": o.id, "conteudo": o.conteudo, "votos": o.votos} for o in enq.opcoes]
-        resultado.append({
-            "id": enq.id,
-            "usuario": enq.usuario.nome,
-            "nome": enq.nome,
-            "titulo": enq.titulo,
-            "conteudo": enq.conteudo,
-            "opcoes": opcoes_data,
-            "criado_em": enq.criado_em
+def _enquete_para_dict(enquete):
+    opcoes_data = [{"id": o.id, "conteudo": o.conteudo, "votos": o.votos} for o in enquete.opcoes]
+    return {
+        "id": enquete.id,
+        "usuario": enquete.usuario.nome,
+        "usuario_id": enquete.usuario.id,
+        "nome": enquete.nome,
+        "titulo": enquete.titulo,
+        "conteudo": enquete.conteudo,
+        "midia": enquete.midia,
+        "opcoes": opcoes_data,
+        "curtidas": enquete.curtidas_count,
+        "criado_em": enquete.criado_em
+    }
+
+def _resultado_para_dict(enquete):
+    opcoes_resultado = []
+    total_votos = 0
+    for opcao in enquete.opcoes:
+        opcoes_resultado.append({
+            "id": opcao.id,
+            "conteudo": opcao.conteudo,
+            "votos": opcao.votos
         })
-    return resultado
+        total_votos += opcao.votos
+    
+    return {
+        "id": enquete.id,
+        "titulo": enquete.titulo,
+        "total_votos": total_votos,
+        "opcoes": opcoes_resultado
+    }
+
+@social_router.get("/enquetes/listar", dependencies=LIMITES_LISTAGEM)
+async def listar_enquetes(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    consulta = select(Enquete.id, Enquete.criado_em)
+    
+    if cursor:
+        criado_em, ultimo_id = decodificar_cursor(cursor)
+        consulta = consulta.where(or_(
+            Enquete.criado_em < criado_em,
+            and_(Enquete.criado_em == criado_em, Enquete.id < ultimo_id)
+        ))
+    
+    linhas = (await session.execute(
+        consulta.order_by(Enquete.criado_em.desc(), Enquete.id.desc()).limit(limit + 1)
+    )).all()
+    proximo = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo = codificar_cursor(linhas[-1].criado_em, linhas[-1].id)
+    
+    # só o índice de criado_em é lido aqui; opções e votos vêm do cache
+    enquetes = await ler_enquetes(session, [linha.id for linha in linhas])
+    resultado = [_enquete_para_dict(enquetes[linha.id]) for linha in linhas if linha.id in enquetes]
+    return json_confiavel({"enquetes": resultado, "next_cursor": proximo})
+
+@social_router.get("/enquetes/lote")
+async def obter_enquetes_lote(
+    ids: List[int] = Query(...),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    ids = _ids_do_lote(ids)
+    enquetes = await ler_enquetes(session, ids)
+    resultado = []
+    for id in ids:
+        if id in enquetes:
+            resultado.append({"status": "ok", **_enquete_para_dict(enquetes[id])})
+        else:
+            resultado.append({"id": id, "status": "nao_encontrado"})
+    return json_confiavel({"enquetes": resultado})
+
+@social_router.get("/enquetes/resultados-lote")
+async def resultados_enquetes_lote(
+    ids: List[int] = Query(...),
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    ids = _ids_do_lote(ids)
+    enquetes = await ler_enquetes(session, ids)
+    resultado = []
+    for id in ids:
+        if id in enquetes:
+            resultado.append({"status": "ok", **_resultado_para_dict(enquetes[id])})
+        else:
+            resultado.append({"id": id, "status": "nao_encontrado"})
+    return json_confiavel({"resultados": resultado})
 
 @social_router.post("/enquetes/{id}/votar")
 async def votar_enquete(
     id: int,
     dados: VotoCriar,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    enquete = session.query(Enquete).filter(Enquete.id == id).first()
-    if not enquete:
+    # Os locks exclusivos da enquete e da opção vêm antes do insert do voto,
+    # que trava as duas linhas em modo compartilhado pela chave estrangeira;
+    # na ordem inversa dois votos simultâneos entram em deadlock no InnoDB.
+    if (await nova_versao(session, Enquete, [id])).rowcount == 0:
         raise HTTPException(status_code=404, detail="Enquete não encontrada")
     
-    opcao = session.query(Opcoes).filter(Opcoes.id == dados.opcao_id).first()
-    if not opcao:
+    opcao = await session.execute(
+        update(Opcoes).where(Opcoes.id == dados.opcao_id, Opcoes.enquete_id == id).values(votos=Opcoes.votos + 1)
+    )
+    if opcao.rowcount == 0:
+        await session.rollback()
         raise HTTPException(status_code=404, detail="Opção não encontrada")
     
-    ja_votou = session.query(Voto).filter(
-        Voto.usuario_id == usuario.id,
-        Voto.enquete_id == id
-    ).first()
-    
-    if ja_votou:
+    try:
+        await session.execute(insert(Voto).values(usuario_id=usuario.id, enquete_id=id, opcao_id=dados.opcao_id))
+    except IntegrityError:
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Você já votou nesta enquete")
     
-    voto = Voto(usuario_id=usuario.id, enquete_id=id, opcao_id=dados.opcao_id)
-    opcao.votos += 1
-    session.add(voto)
-    session.commit()
+    versao = (await session.execute(
+        select(Enquete.versao, Enquete.atualizado_em).where(Enquete.id == id)
+    )).first()
+    await session.commit()
+    # os outros workers recebem o mesmo ajuste pelo evento
+    cache_enquetes.aplicar_voto(id, dados.opcao_id, 1, versao.versao, versao.atualizado_em)
+    await publicar(
+        "voto",
+        enquete_id=id,
+        opcao_id=dados.opcao_id,
+        usuario_id=usuario.id,
+        delta=1,
+        versao=versao.versao,
+        atualizado_em=versao.atualizado_em
+    )
     
     return {"mensagem": "Voto registrado com sucesso"}
 
-@social_router.get("/enquetes/{id}/resultado")
-async def resultado_enquete(id: int, session: Session = Depends(pegar_sessao)):
-    enquete = session.query(Enquete).filter(Enquete.id == id).first()
+@social_router.get("/enquetes/{id}/resultado", response_model=ResultadoEnquete)
+async def resultado_enquete(
+    id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    enquete = await ler_enquete(session, id)
     if not enquete:
         raise HTTPException(status_code=404, detail="Enquete não encontrada")
+    nao_modificado = condicional(request, response, "resultado", id, enquete)
+    if nao_modificado:
+        return nao_modificado
     
-    opcoes_resultado = []
-    total_votos = 0
-    for opcao in enquete.opcoes:
-        opcoes_resultado.append({
-            "id": opcao.id,
-            "conteudo": opcao.conteudo,
-            "votos": opcao.votos
-        })
-        total_votos += opcao.votos
-    
-    return {
-        "id": enquete.id,
-        "titulo": enquete.titulo,
-        "total_votos": total_votos,
-        "opcoes": opcoes_resultado
-    }
+    return json_confiavel(_resultado_para_dict(enquete), response)
 
 @social_router.delete("/enquetes/{id}")
 async def deletar_enquete(
     id: int,
-    usuario: Usuario = Depends(verificar_token),
-    session: Session = Depends(pegar_sessao)
+    usuario: UsuarioPublico = Depends(verificar_token_async),
+    session: AsyncSession = Depends(pegar_sessao_async)
 ):
-    enquete = session.query(Enquete).filter(Enquete.id == id).first()
+    enquete = (await session.execute(select(Enquete).where(Enquete.id == id))).scalar_one_or_none()
     if not enquete:
         raise HTTPException(status_code=404, detail="Enquete não encontrada")
     
     if enquete.usuario_id != usuario.id:
         raise HTTPException(status_code=403, detail="Você não tem permissão para deletar esta enquete")
     
-    session.delete(enquete)
-    session.commit()
+    await remover_item(session, "enquete", id)
+    await session.delete(enquete)
+    await session.commit()
+    cache_enquetes.invalidar(id)
+    await publicar("enquete_removida", enquete_id=id, usuario_id=usuario.id)
     return {"mensagem": "Enquete deletada com sucesso"}
 
-@social_router.get("/enquetes/{id}")
-async def obter_enquete(id: int, session: Session = Depends(pegar_sessao)):
-    enquete = session.query(Enquete).filter(Enquete.id == id).first()
+@social_router.get("/enquetes/{id}", response_model=EnqueteCompleta)
+async def obter_enquete(
+    id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(pegar_sessao_async)
+):
+    enquete = await ler_enquete(session, id)
     if not enquete:
         raise HTTPException(status_code=404, detail="Enquete não encontrada")
+    nao_modificado = condicional(request, response, "enquete", id, enquete)
+    if nao_modificado:
+        return nao_modificado
     
-    opcoes_data = [{"id": o.id, "conteudo": o.conteudo, "votos": o.votos} for o in enquete.opcoes]
-    curtidas = len(enquete.curtidas) if enquete.curtidas else 0
-    
-    return {
-        "id": enquete.id,
-        "usuario": enquete.usuario.nome,
-        "usuario_id": enquete.usuario.id,
-        "nome": enquete.nome,
-        "titulo": enquete.titulo,
-        "conteudo": enquete.conteudo,
-        "midia": enquete.midia,
-        "opcoes": opcoes_data,
-        "curtidas": curtidas,
-        "criado_em": enquete.criado_em
-    }
+    return json_confiavel(_enquete_para_dict(enquete), response)
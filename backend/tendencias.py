@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+from sqlalchemy import select
+from models import SessaoAsync, Comentario, Enquete, Curtida, Resposta, Voto
+from serializacao import RespostaJSON
+from timeline import hidratar
+
+TENDENCIAS_MEIA_VIDA_H = float(os.getenv("TENDENCIAS_MEIA_VIDA_H", "6"))
+TENDENCIAS_JANELA_H = float(os.getenv("TENDENCIAS_JANELA_H", "72"))
+TENDENCIAS_TOP_K = int(os.getenv("TENDENCIAS_TOP_K", "50"))
+TENDENCIAS_INTERVALO_S = float(os.getenv("TENDENCIAS_INTERVALO_S", "30"))
+
+PESOS = {
+    "criacao": float(os.getenv("TENDENCIAS_PESO_CRIACAO", "1")),
+    "curtida": float(os.getenv("TENDENCIAS_PESO_CURTIDA", "1")),
+    "resposta": float(os.getenv("TENDENCIAS_PESO_RESPOSTA", "3")),
+    "voto": float(os.getenv("TENDENCIAS_PESO_VOTO", "1"))
+}
+
+logger = logging.getLogger(__name__)
+
+# As datas do banco são gravadas sem fuso e tratadas como UTC (como no http_cache).
+def _instante(data):
+    if isinstance(data, str):
+        data = datetime.fromisoformat(data)
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data.timestamp()
+
+# Pontuação com decaimento exponencial: cada interação vale peso * 2^(-idade/meia_vida).
+# Em vez de decair todos os itens a cada instante, cada interação entra já
+# multiplicada por e^(lambda * (t - referencia)); o fator comum de decaimento não
+# muda a ordem, então o ranking é só o maior valor acumulado. De tempos em
+# tempos a referência avança e os valores são reescalados para não estourar.
+class Tendencias:
+    def __init__(self):
+        self._decaimento = math.log(2) / (TENDENCIAS_MEIA_VIDA_H * 3600)
+        self._referencia = time.time()
+        self._itens = {}
+        self._alterado = True
+        self._tarefa = None
+        self._corpo = b'{"itens":[],"gerado_em":null}'
+        self.etag = 'W/"tendencias-0"'
+        self.geracao = 0
+        self.eventos = 0
+        self.tempo_calculo = 0.0
+    
+    def _peso(self, tipo, instante):
+        return PESOS[tipo] * math.exp(self._decaimento * (instante - self._referencia))
+    
+    def registrar(self, tipo, item_id, criado_em):
+        if criado_em < time.time() - TENDENCIAS_JANELA_H * 3600:
+            return
+        self._itens[(tipo, item_id)] = [self._peso("criacao", criado_em), criado_em]
+        self._alterado = True
+    
+    def remover(self, tipo, item_id):
+        if self._itens.pop((tipo, item_id), None):
+            self._alterado = True
+    
+    def somar(self, tipo, item_id, interacao, delta=1, instante=None):
+        item = self._itens.get((tipo, item_id))
+        if item is None:
+            return
+        # descurtir tira o peso de agora, que pode ser maior do que o da curtida original
+        item[0] = max(0.0, item[0] + delta * self._peso(interacao, instante or time.time()))
+        self._alterado = True
+    
+    def atualizar(self, evento):
+        tipo = evento["tipo"]
+        self.eventos += 1
+        if tipo == "post_criado":
+            self.registrar("comentario", evento["post_id"], _instante(evento["criado_em"]) if evento.get("criado_em") else time.time())
+        elif tipo == "enquete_criada":
+            self.registrar("enquete", evento["enquete_id"], time.time())
+        elif tipo == "post_removido":
+            self.remover("comentario", evento["post_id"])
+        elif tipo == "enquete_removida":
+            self.remover("enquete", evento["enquete_id"])
+        elif tipo == "curtida":
+            self.somar("comentario", evento["post_id"], "curtida", evento.get("delta", 1))
+        elif tipo == "resposta":
+            self.somar("comentario", evento["post_id"], "resposta", evento.get("delta", 1))
+        elif tipo == "voto":
+            self.somar("enquete", evento["enquete_id"], "voto", evento.get("delta", 1))
+    
+    # itens da janela e as interações que receberam, com a data de cada uma
+    async def carregar(self, tamanho_lote=10000):
+        limite = datetime.fromtimestamp(time.time() - TENDENCIAS_JANELA_H * 3600, timezone.utc).replace(tzinfo=None)
+        self._itens = {}
+        async with SessaoAsync() as session:
+            for modelo, tipo in ((Comentario, "comentario"), (Enquete, "enquete")):
+                linhas = await session.stream(
+                    select(modelo.id, modelo.criado_em).where(modelo.criado_em >= limite)
+                    .execution_options(yield_per=tamanho_lote)
+                )
+                async for item_id, criado_em in linhas:
+                    self.registrar(tipo, item_id, _instante(criado_em))
+    
+            for coluna, data, modelo, tipo, interacao in (
+                (Curtida.comentario_id, Curtida.criado_em, Comentario, "comentario", "curtida"),
+                (Resposta.comentario_id, Resposta.criado_em, Comentario, "comentario", "resposta"),
+                (Voto.enquete_id, Voto.criado_em, Enquete, "enquete", "voto")
+            ):
+                linhas = await session.stream(
+                    select(coluna, data).join(modelo, modelo.id == coluna).where(modelo.criado_em >= limite)
+                    .execution_options(yield_per=tamanho_lote)
+                )
+                async for item_id, criado_em in linhas:
+                    self.somar(tipo, item_id, interacao, instante=_instante(criado_em))
+        await self.calcular()
+    
+    async def calcular(self):
+        inicio = time.perf_counter()
+        agora = time.time()
+        limite = agora - TENDENCIAS_JANELA_H * 3600
+        for chave in [chave for chave, (_, criado_em) in self._itens.items() if criado_em < limite]:
+            self.remover(*chave)
+        # depois de ~500 meias-vidas e^(lambda * t) passaria do limite do float
+        if self._decaimento * (agora - self._referencia) > 300:
+            fator = math.exp(-self._decaimento * (agora - self._referencia))
+            for item in self._itens.values():
+                item[0] *= fator
+            self._referencia = agora
+        if not self._alterado:
+            return
+        self._alterado = False
+    
+        melhores = heapq.nlargest(TENDENCIAS_TOP_K, self._itens.items(), key=lambda item: (item[1][0], item[1][1]))
+        fator = math.exp(-self._decaimento * (agora - self._referencia))
+        pontuacoes = {chave: pontuacao * fator for chave, (pontuacao, _) in melhores}
+        async with SessaoAsync() as session:
+            itens = await hidratar(session, [(None, item_id, tipo) for (tipo, item_id), _ in melhores])
+        for item in itens:
+            item["pontuacao"] = round(pontuacoes[(item["tipo"], item["id"])], 4)
+    
+        self.geracao += 1
+        self._corpo = RespostaJSON({
+            "itens": itens,
+            "gerado_em": datetime.fromtimestamp(agora, timezone.utc).replace(tzinfo=None, microsecond=0)
+        }).body
+        self.etag = f'W/"tendencias-{self.geracao}"'
+        self.tempo_calculo = time.perf_counter() - inicio
+    
+    def snapshot(self):
+        return self._corpo
+    
+    async def _executar(self):
+        while True:
+            await asyncio.sleep(TENDENCIAS_INTERVALO_S)
+            try:
+                await self.calcular()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Falha ao recalcular as tendências")
+    
+    async def iniciar(self):
+        await self.carregar()
+        self._tarefa = asyncio.create_task(self._executar())
+    
+    async def parar(self):
+        if self._tarefa:
+            self._tarefa.cancel()
+    
+    def estatisticas(self):
+        return {
+            "itens": len(self._itens),
+            "geracao": self.geracao,
+            "eventos": self.eventos,
+            "tempo_calculo_ms": round(self.tempo_calculo * 1000, 3)
+        }
+
+tendencias = Tendencias()
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+# a configuração é lida na importação dos módulos, então o banco de teste e as
+# variáveis precisam estar definidos antes de qualquer import do backend
+_pasta = tempfile.mkdtemp(prefix="rede-social-testes-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_pasta, 'testes.db')}",
+    SECRET_KEY="segredo-de-teste",
+    ALGORITHM="HS256",
+    ACESS_TOKEN_EXPIRE_MINUTES="30",
+    BCRYPT_ROUNDS="4",
+    LIMITES_ATIVOS="false",
+    MIDIA_DIR=os.path.join(_pasta, "midia")
+)
+os.environ.pop("DATABASE_URL_ASYNC", None)
+os.environ.pop("BROKER_URL", None)
+os.environ.pop("LIMITES_URL", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
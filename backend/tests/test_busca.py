@@ -0,0 +1,29 @@
+import pytest
+from busca import radical, termos, IndiceBusca
+
+@pytest.mark.parametrize("singular, plural", [
+    ("ação", "ações"),
+    ("eleição", "eleições"),
+    ("canção", "canções"),
+    ("visão", "visões"),
+    ("limão", "limões"),
+    ("animal", "animais"),
+    ("curtida", "curtidas"),
+    ("mãe", "mães")
+])
+def test_singular_e_plural_tem_o_mesmo_radical(singular, plural):
+    assert termos(singular) == termos(plural)
+
+def test_palavras_curtas_nao_mudam():
+    assert radical("sol") == "sol"
+
+def test_stopwords_sao_ignoradas():
+    assert termos("a casa de pedra") == termos("casa pedra")
+
+def test_busca_sem_acento_encontra_o_plural():
+    indice = IndiceBusca()
+    indice.adicionar("post", 1, "Novas ações", "as ações do grupo")
+    indice.adicionar("post", 2, "Outro assunto", "nada a ver")
+    encontrados, total, _ = indice.buscar("acao", 10)
+    assert total == 1
+    assert [chave for chave, _ in encontrados] == [("post", 1)]
@@ -0,0 +1,66 @@
+import asyncio
+import httpx
+from sqlalchemy import select, func
+from models import Base, db, SessaoLocal, Opcoes, Voto
+from main import app
+
+VOTANTES = 25
+
+async def _registrar(cliente, nome):
+    await cliente.post("/auth/registrar", json={"nome": nome, "email": f"{nome}@teste.com", "senha": "123"})
+    resposta = await cliente.post("/auth/login", json={"email": f"{nome}@teste.com", "senha": "123"})
+    return {"Authorization": f"Bearer {resposta.json()['acess_token']}"}
+
+async def _votar_em_paralelo():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+        autor = await _registrar(cliente, "autor")
+        enquete_id = (await cliente.post("/social/enquetes/criar", json={
+            "nome": "enquete",
+            "conteudo": "qual?",
+            "opcoes_list": [{"conteudo": "a"}, {"conteudo": "b"}, {"conteudo": "c"}]
+        }, headers=autor)).json()["id"]
+        opcoes = [opcao["id"] for opcao in (await cliente.get(f"/social/enquetes/{enquete_id}")).json()["opcoes"]]
+        votantes = [await _registrar(cliente, f"votante{numero}") for numero in range(VOTANTES)]
+    
+        # cada votante vota duas vezes ao mesmo tempo, em opções diferentes
+        tentativas = []
+        for numero, cabecalhos in enumerate(votantes):
+            for deslocamento in (0, 1):
+                tentativas.append(cliente.post(
+                    f"/social/enquetes/{enquete_id}/votar",
+                    json={"opcao_id": opcoes[(numero + deslocamento) % len(opcoes)]},
+                    headers=cabecalhos
+                ))
+        respostas = await asyncio.gather(*tentativas)
+        resultado = (await cliente.get(f"/social/enquetes/{enquete_id}/resultado")).json()
+    return enquete_id, [resposta.status_code for resposta in respostas], resultado
+
+def test_votos_simultaneos_batem_com_a_tabela_de_votos():
+    Base.metadata.create_all(db)
+    enquete_id, status, resultado = asyncio.run(_votar_em_paralelo())
+    
+    assert status.count(200) == VOTANTES
+    assert status.count(400) == VOTANTES
+    
+    with SessaoLocal() as session:
+        total_contadores = session.execute(
+            select(func.sum(Opcoes.votos)).where(Opcoes.enquete_id == enquete_id)
+        ).scalar()
+        total_votos = session.execute(
+            select(func.count()).select_from(Voto).where(Voto.enquete_id == enquete_id)
+        ).scalar()
+        por_opcao = dict(session.execute(
+            select(Voto.opcao_id, func.count()).where(Voto.enquete_id == enquete_id).group_by(Voto.opcao_id)
+        ).all())
+        contadores = dict(session.execute(
+            select(Opcoes.id, Opcoes.votos).where(Opcoes.enquete_id == enquete_id)
+        ).all())
+        repetidos = session.execute(
+            select(Voto.usuario_id).where(Voto.enquete_id == enquete_id)
+            .group_by(Voto.usuario_id).having(func.count() > 1)
+        ).all()
+    
+    assert total_contadores == total_votos == VOTANTES
+    assert contadores == {opcao_id: por_opcao.get(opcao_id, 0) for opcao_id in contadores}
+    assert repetidos == []
+    assert resultado["total_votos"] == VOTANTES
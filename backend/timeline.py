@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+from sqlalchemy import select, insert, delete, update, func, literal, or_, and_
+from models import SessaoAsync, Usuario, Comentario, Enquete, TimelineItem, seguidor_association
+from paginacao import codificar_cursor
+
+TIMELINE_TAMANHO_MAX = int(os.getenv("TIMELINE_TAMANHO_MAX", "800"))
+TIMELINE_LIMITE_FANOUT = int(os.getenv("TIMELINE_LIMITE_FANOUT", "5000"))
+TIMELINE_APARAR_INTERVALO_S = float(os.getenv("TIMELINE_APARAR_INTERVALO_S", "600"))
+
+logger = logging.getLogger(__name__)
+
+# Autores com mais seguidores que TIMELINE_LIMITE_FANOUT são marcados como
+# populares: seus itens não são copiados para cada seguidor, e sim lidos
+# diretamente das tabelas de origem na hora de montar a timeline.
+async def distribuir_item(autor_id, tipo, item_id, criado_em):
+    async with SessaoAsync() as session:
+        popular = (await session.execute(select(Usuario.popular).where(Usuario.id == autor_id))).scalar()
+        if not popular:
+            seguidores = (await session.execute(
+                select(func.count()).select_from(seguidor_association).where(
+                    seguidor_association.c.seguindo_id == autor_id
+                )
+            )).scalar()
+            popular = seguidores > TIMELINE_LIMITE_FANOUT
+            if popular:
+                await session.execute(
+                    update(Usuario).where(Usuario.id == autor_id, Usuario.popular == False).values(popular=True)
+                )
+        if not popular:
+            origem = select(
+                seguidor_association.c.seguidor_id,
+                literal(autor_id),
+                literal(tipo),
+                literal(item_id),
+                literal(criado_em, TimelineItem.criado_em.type)
+            ).where(seguidor_association.c.seguindo_id == autor_id)
+            await session.execute(
+                insert(TimelineItem).from_select(
+                    ["usuario_id", "autor_id", "tipo", "item_id", "criado_em"], origem
+                )
+            )
+        session.add(TimelineItem(autor_id, autor_id, tipo, item_id, criado_em))
+        await session.commit()
+
+async def remover_item(session, tipo, item_id):
+    await session.execute(
+        delete(TimelineItem).where(TimelineItem.tipo == tipo, TimelineItem.item_id == item_id)
+    )
+
+# ao deixar de seguir, os itens já copiados daquele autor saem da timeline
+async def remover_autor(session, usuario_id, autor_id):
+    await session.execute(
+        delete(TimelineItem).where(TimelineItem.usuario_id == usuario_id, TimelineItem.autor_id == autor_id)
+    )
+
+async def aparar_timeline(usuario_id):
+    async with SessaoAsync() as session:
+        limite = (await session.execute(
+            select(TimelineItem.criado_em, TimelineItem.item_id).where(
+                TimelineItem.usuario_id == usuario_id
+            ).order_by(
+                TimelineItem.criado_em.desc(), TimelineItem.item_id.desc()
+            ).offset(TIMELINE_TAMANHO_MAX - 1).limit(1)
+        )).first()
+        if limite:
+            await session.execute(
+                delete(TimelineItem).where(
+                    TimelineItem.usuario_id == usuario_id,
+                    _anterior_a(TimelineItem, limite.criado_em, limite.item_id, "item_id")
+                )
+            )
+            await session.commit()
+
+# O fan-out só acrescenta linhas e a leitura da primeira página só apara quem
+# abre a timeline; esta tarefa apara periodicamente as timelines de todos os
+# usuários que passaram de TIMELINE_TAMANHO_MAX.
+async def aparar_timelines():
+    async with SessaoAsync() as session:
+        usuarios = (await session.execute(
+            select(TimelineItem.usuario_id)
+            .group_by(TimelineItem.usuario_id)
+            .having(func.count() > TIMELINE_TAMANHO_MAX)
+        )).scalars().all()
+    for usuario_id in usuarios:
+        await aparar_timeline(usuario_id)
+    return len(usuarios)
+
+async def _aparar_periodicamente():
+    while True:
+        await asyncio.sleep(TIMELINE_APARAR_INTERVALO_S)
+        try:
+            await aparar_timelines()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Falha ao aparar as timelines")
+
+_tarefa_aparar = None
+
+def iniciar_aparador():
+    global _tarefa_aparar
+    if TIMELINE_APARAR_INTERVALO_S > 0:
+        _tarefa_aparar = asyncio.create_task(_aparar_periodicamente())
+
+def parar_aparador():
+    if _tarefa_aparar:
+        _tarefa_aparar.cancel()
+
+def _anterior_a(modelo, criado_em, id, coluna_id="id"):
+    coluna = getattr(modelo, coluna_id)
+    return or_(
+        modelo.criado_em < criado_em,
+        and_(modelo.criado_em == criado_em, coluna < id)
+    )
+
+async def ler_timeline(session, usuario_id, limit, cursor=None):
+    consulta = select(
+        TimelineItem.tipo, TimelineItem.item_id, TimelineItem.criado_em
+    ).where(TimelineItem.usuario_id == usuario_id)
+    if cursor:
+        consulta = consulta.where(_anterior_a(TimelineItem, cursor[0], cursor[1], "item_id"))
+    entradas = [
+        (e.criado_em, e.item_id, e.tipo)
+        for e in await session.execute(
+            consulta.order_by(
+                TimelineItem.criado_em.desc(), TimelineItem.item_id.desc()
+            ).limit(limit + 1)
+        )
+    ]
+
+    populares = (await session.execute(
+        select(seguidor_association.c.seguindo_id)
+        .join(Usuario, Usuario.id == seguidor_association.c.seguindo_id)
+        .where(seguidor_association.c.seguidor_id == usuario_id, Usuario.popular == True)
+    )).scalars().all()
+    if populares:
+        for modelo, tipo in ((Comentario, "comentario"), (Enquete, "enquete")):
+            consulta = select(modelo.id, modelo.criado_em).where(modelo.usuario_id.in_(populares))
+            if cursor:
+                consulta = consulta.where(_anterior_a(modelo, cursor[0], cursor[1]))
+            entradas.extend(
+                (linha.criado_em, linha.id, tipo)
+                for linha in await session.execute(
+                    consulta.order_by(modelo.criado_em.desc(), modelo.id.desc()).limit(limit + 1)
+                )
+            )
+        entradas = sorted(set(entradas), reverse=True)
+
+    proximo = None
+    if len(entradas) > limit:
+        entradas = entradas[:limit]
+        proximo = codificar_cursor(entradas[-1][0], entradas[-1][1])
+
+    return await hidratar(session, entradas), proximo
+
+async def hidratar(session, entradas):
+    ids = {"comentario": [], "enquete": []}
+    for _, item_id, tipo in entradas:
+        ids[tipo].append(item_id)
+
+    itens = {}
+    if ids["comentario"]:
+        for com, nome in await session.execute(
+            select(Comentario, Usuario.nome)
+            .join(Usuario, Usuario.id == Comentario.usuario_id)
+            .where(Comentario.id.in_(ids["comentario"]))
+        ):
+            itens[("comentario", com.id)] = {
+                "tipo": "comentario",
+                "id": com.id,
+                "usuario": nome,
+                "usuario_id": com.usuario_id,
+                "titulo": com.titulo,
+                "conteudo": com.conteudo,
+                "midia": com.midia,
+                "curtidas": com.curtidas_count,
+                "respostas": com.respostas_count,
+                "criado_em": com.criado_em
+            }
+    if ids["enquete"]:
+        for enq, nome in await session.execute(
+            select(Enquete, Usuario.nome)
+            .join(Usuario, Usuario.id == Enquete.usuario_id)
+            .where(Enquete.id.in_(ids["enquete"]))
+        ):
+            itens[("enquete", enq.id)] = {
+                "tipo": "enquete",
+                "id": enq.id,
+                "usuario": nome,
+                "usuario_id": enq.usuario_id,
+                "nome": enq.nome,
+                "titulo": enq.titulo,
+                "conteudo": enq.conteudo,
+                "midia": enq.midia,
+                "curtidas": enq.curtidas_count,
+                "criado_em": enq.criado_em
+            }
+
+    return [itens[(tipo, item_id)] for _, item_id, tipo in entradas if (tipo, item_id) in itens]
@@ -0,0 +1,130 @@
+import argparse
+import random
+import sys
+from datetime import datetime
+from sqlalchemy import event, select, func
+from fastapi.testclient import TestClient
+import main
+from models import db, db_async, SessaoLocal, Base, Usuario, Comentario, Enquete, Opcoes, Curtida, Resposta, seguidor_association
+from paginacao import codificar_cursor
+from auth_routes import criar_token
+
+CURSOR_FIM = codificar_cursor(datetime(2100, 1, 1), 1)
+
+# (método, caminho, precisa de token, corpo)
+ROTAS = [
+    ("GET", "/social/posts/listar", False, None),
+    ("GET", f"/social/posts/listar?cursor={CURSOR_FIM}", False, None),
+    ("GET", "/social/timeline", True, None),
+    ("GET", "/social/posts/1", False, None),
+    ("GET", "/social/posts/1/curtidas", False, None),
+    ("GET", "/social/posts/1/respostas", False, None),
+    ("GET", "/social/posts/lote?ids=1&ids=2&ids=3", False, None),
+    ("GET", "/social/buscar?q=post", False, None),
+    ("POST", "/social/posts/curtir-lote", True, {"ids": [4, 5, 6]}),
+    ("POST", "/social/posts/descurtir-lote", True, {"ids": [4, 5, 6]}),
+    ("POST", "/social/posts/criar", True, {"conteudo": "plano"}),
+    ("POST", "/social/posts/2/curtir", True, None),
+    ("DELETE", "/social/posts/2/descurtir", True, None),
+    ("POST", "/social/posts/2/responder", True, {"conteudo": "plano"}),
+    ("POST", "/social/usuarios/2/seguir", True, None),
+    ("DELETE", "/social/usuarios/2/deixar-de-seguir", True, None),
+    ("GET", "/social/usuarios/2/seguidores", False, None),
+    ("GET", "/social/usuarios/2/seguindo", False, None),
+    ("GET", "/social/usuarios/2/perfil", False, None),
+    ("GET", "/social/enquetes/1", False, None),
+    ("GET", "/social/enquetes/1/resultado", False, None),
+    ("GET", "/social/enquetes/lote?ids=1&ids=2", False, None),
+    ("GET", "/social/enquetes/resultados-lote?ids=1&ids=2", False, None),
+    ("POST", "/social/enquetes/1/votar", True, {"opcao_id": 1}),
+    ("GET", "/social/enquetes/listar", False, None),
+    ("GET", f"/social/enquetes/listar?cursor={CURSOR_FIM}", False, None),
+    ("GET", "/social/explorar/trending", False, None),
+]
+
+# rotas que ainda leem a tabela inteira de propósito
+PERMITIDOS = {}
+
+def popular_banco(session, usuarios=200, posts=2000, enquetes=200):
+    aleatorio = random.Random(42)
+    session.add_all(Usuario(f"usuario{i}", f"usuario{i}@plano.local", "-") for i in range(usuarios))
+    session.flush()
+    ids = [u for u in session.execute(select(Usuario.id)).scalars()]
+    session.add_all(Comentario(aleatorio.choice(ids), None, f"post {i}") for i in range(posts))
+    session.add_all(Enquete(aleatorio.choice(ids), f"enquete-plano-{i}", None, "enquete") for i in range(enquetes))
+    session.flush()
+    comentarios = [c for c in session.execute(select(Comentario.id)).scalars()]
+    for enquete_id in session.execute(select(Enquete.id)).scalars():
+        session.add_all(Opcoes(enquete_id, f"opção {n}") for n in range(3))
+    pares = {(aleatorio.choice(ids), aleatorio.choice(comentarios)) for _ in range(posts * 3)}
+    session.add_all(Curtida(u, comentario_id=c) for u, c in pares)
+    session.add_all(Resposta(aleatorio.choice(ids), aleatorio.choice(comentarios), "resposta") for _ in range(posts))
+    seguidores = {(a, b) for a, b in ((aleatorio.choice(ids), aleatorio.choice(ids)) for _ in range(usuarios * 10)) if a != b}
+    session.execute(seguidor_association.insert(), [{"seguidor_id": a, "seguindo_id": b} for a, b in seguidores])
+    session.commit()
+
+def explicar(conexao, sql, parametros):
+    if db.dialect.name == "sqlite":
+        linhas = conexao.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, parametros).all()
+        plano = [linha[-1] for linha in linhas]
+        varreduras = [
+            detalhe for detalhe in plano
+            if detalhe.startswith("SCAN ") and "USING" not in detalhe and "CONSTANT ROW" not in detalhe
+        ]
+    else:
+        linhas = conexao.exec_driver_sql("EXPLAIN " + sql, parametros).mappings().all()
+        plano = [f"{linha['table']}: type={linha['type']} key={linha['key']}" for linha in linhas]
+        varreduras = [
+            f"{linha['table']}: type=ALL" for linha in linhas
+            if linha["type"] == "ALL" and not str(linha["table"]).startswith("<")
+        ]
+    return plano, varreduras
+
+def main_cli():
+    parser = argparse.ArgumentParser(
+        description="Executa as rotas principais e falha se alguma consulta fizer varredura completa de tabela. "
+                    "Grava dados de teste: use um banco descartável (DATABASE_URL)."
+    )
+    parser.add_argument("-v", "--verboso", action="store_true", help="mostra o plano de todas as consultas")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(db)
+    with SessaoLocal() as session:
+        if not session.execute(select(func.count()).select_from(Comentario)).scalar():
+            popular_banco(session)
+        usuario_id = session.execute(select(func.min(Usuario.id))).scalar()
+    with db.connect() as conexao:
+        conexao.exec_driver_sql("ANALYZE" if db.dialect.name == "sqlite" else "ANALYZE TABLE " + ", ".join(Base.metadata.tables))
+
+    capturadas = []
+    @event.listens_for(db_async.sync_engine, "before_cursor_execute")
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        capturadas.append((statement, parameters))
+
+    cabecalho = {"Authorization": f"Bearer {criar_token(usuario_id)}"}
+    falhas = 0
+    with TestClient(main.app) as cliente, db.connect() as conexao:
+        for metodo, caminho, autenticado, corpo in ROTAS:
+            capturadas.clear()
+            cliente.request(metodo, caminho, headers=cabecalho if autenticado else None, json=corpo)
+            for sql, parametros in capturadas:
+                comando = sql.lstrip().split(None, 1)[0].upper()
+                if comando not in ("SELECT", "UPDATE", "DELETE", "INSERT") or (comando == "INSERT" and "SELECT" not in sql.upper()):
+                    continue
+                plano, varreduras = explicar(conexao, sql, parametros)
+                permitido = caminho in PERMITIDOS
+                if varreduras and not permitido:
+                    falhas += 1
+                if varreduras or args.verboso:
+                    estado = "OK" if not varreduras else ("PERMITIDO" if permitido else "VARREDURA")
+                    print(f"[{estado}] {metodo} {caminho}\n  {' '.join(sql.split())}")
+                    for linha in plano:
+                        print(f"    {linha}")
+            if not args.verboso:
+                print(f"{metodo} {caminho}: {len(capturadas)} consulta(s)")
+
+    print(f"{falhas} consulta(s) com varredura completa")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,131 @@
+$(document).ready(function() {
+
+    const API_URL = 'http://127.0.0.1:5000';
+
+    let tipoAtual = 'todos';
+    let paginaAtual = 1;
+
+    function montarResultado(item) {
+        const data = item.criado_em ? new Date(item.criado_em).toLocaleString('pt-BR') : '';
+
+        if (item.tipo === 'usuario') {
+            return `
+                <div class="card" data-tipo="usuario" data-id="${item.id}">
+                    <div class="card-header">
+                        <span class="card-title">👤 ${item.nome}</span>
+                    </div>
+                </div>
+            `;
+        }
+
+        if (item.tipo === 'enquete') {
+            return `
+                <div class="card" data-tipo="enquete" data-id="${item.id}">
+                    <div class="card-header">
+                        <span class="card-title">📊 ${item.titulo || item.nome}</span>
+                    </div>
+                    <p>${item.conteudo}</p>
+                    <small>${item.usuario} · ${data}</small>
+                </div>
+            `;
+        }
+
+        return `
+            <div class="card" data-tipo="post" data-id="${item.id}">
+                <div class="card-header">
+                    <span class="card-title">${item.titulo || item.usuario}</span>
+                </div>
+                <p>${item.conteudo}</p>
+                <small>${item.usuario} · ${data} · 👍 ${item.curtidas} · 💬 ${item.respostas}</small>
+            </div>
+        `;
+    }
+
+    // sem termo de busca a página mostra o que está em alta
+    function carregarTendencias() {
+        $.ajax({
+            type: 'GET',
+            url: `${API_URL}/social/explorar/trending`,
+            success: function(resposta) {
+                $('#lista-resultados').empty();
+                if (resposta.itens.length === 0) {
+                    $('#lista-resultados').html('<p class="mensagem-inicial">Digite...</p>');
+                    return;
+                }
+                $('#lista-resultados').append('<p class="mensagem-inicial">Em alta agora</p>');
+                resposta.itens.forEach(item => {
+                    const tipo = item.tipo === 'comentario' ? 'post' : item.tipo;
+                    $('#lista-resultados').append(montarResultado({ ...item, tipo: tipo }));
+                });
+            },
+            error: function(erro) {
+                console.error('Erro ao carregar tendências:', erro);
+                $('#lista-resultados').html('<p class="mensagem-inicial">Digite...</p>');
+            }
+        });
+    }
+
+    function buscar(pagina) {
+        const termo = $('#input-busca').val().trim();
+        if (!termo) {
+            carregarTendencias();
+            return;
+        }
+
+        $.ajax({
+            type: 'GET',
+            url: `${API_URL}/social/buscar`,
+            data: { q: termo, tipo: tipoAtual, pagina: pagina },
+            success: function(resposta) {
+                paginaAtual = pagina;
+                if (pagina === 1) {
+                    $('#lista-resultados').empty();
+                }
+                $('#btn-mais-resultados').remove();
+
+                if (resposta.total === 0) {
+                    $('#lista-resultados').html('<p class="mensagem-inicial">Nenhum resultado encontrado.</p>');
+                    return;
+                }
+
+                if (pagina === 1) {
+                    $('#lista-resultados').append(
+                        `<p class="mensagem-inicial">${resposta.total} resultado(s) em ${resposta.tempo_ms} ms</p>`
+                    );
+                }
+                resposta.resultados.forEach(item => {
+                    $('#lista-resultados').append(montarResultado(item));
+                });
+
+                if (resposta.tem_mais) {
+                    $('#lista-resultados').append('<button id="btn-mais-resultados" class="filtro-btn">Mais resultados</button>');
+                }
+            },
+            error: function(erro) {
+                console.error('Erro na busca:', erro);
+                $('#lista-resultados').html('<p style="color:red">Erro ao buscar.</p>');
+            }
+        });
+    }
+
+    $('#btn-buscar').on('click', function() {
+        buscar(1);
+    });
+
+    $('#input-busca').on('keypress', function(e) {
+        if (e.which === 13) buscar(1);
+    });
+
+    $('.filtro-btn').on('click', function() {
+        $('.filtro-btn').removeClass('ativo');
+        $(this).addClass('ativo');
+        tipoAtual = $(this).data('tipo');
+        buscar(1);
+    });
+
+    $(document).on('click', '#btn-mais-resultados', function() {
+        buscar(paginaAtual + 1);
+    });
+
+    carregarTendencias();
+});
@@ -8,48 +8,67 @@ $(document).ready(function() {
     const token = localStorage.getItem('acess_token');
 
   
-    function carregarPosts() {
+    let proximoCursor = null;
+
+    // mídias enviadas por /midia/upload vêm como caminho relativo à API
+    function urlMidia(midia) {
+        return midia.startsWith('/') ? `${API_URL}${midia}` : midia;
+    }
+
+    function montarPost(post) {
+        const dataFormatada = new Date(post.criado_em).toLocaleString('pt-BR');
+        return `
+            <div class="post-card" data-id="${post.id}">
+                <div class="post-header">
+                    <span class="post-author">${post.usuario}</span>
+                    <span class="post-date">${dataFormatada}</span>
+                </div>
+                ${post.titulo ? `<div class="post-title">${post.titulo}</div>` : ''}
+                <div class="post-content">${post.conteudo}</div>
+                ${post.midia ? `<div class="post-media"><img src="${urlMidia(post.midia)}" loading="lazy" alt="Mídia do post"></div>` : ''}
+                
+                <div class="post-actions">
+                    <button class="btn-acao btn-curtir">
+                        👍 <span class="qtd-curtidas">${post.curtidas}</span> Curtir
+                    </button>
+                    <button class="btn-acao btn-responder">
+                        💬 <span class="qtd-respostas">${post.respostas}</span> Responder
+                    </button>
+                </div>
+            </div>
+        `;
+    }
+
+    function carregarPosts(cursor) {
         $.ajax({
             type: 'GET',
             url: `${API_URL}/social/posts/listar`, //
+            data: cursor ? { cursor: cursor } : {},
             headers: {
                 'Authorization': `Bearer ${token}`
             },
-            success: function(posts) {
-                $('#feed').empty();
+            success: function(resposta) {
+                const posts = resposta.posts;
+                proximoCursor = resposta.next_cursor;
+
+                if (!cursor) {
+                    $('#feed').empty();
+                }
+                $('#btn-carregar-mais').remove();
                 
-                if (posts.length === 0) {
+                if (!cursor && posts.length === 0) {
                     $('#feed').html('<p style="text-align:center; margin-top: 20px;">Nenhuma publicação encontrada.</p>');
                     return;
                 }
 
               
-                posts.reverse().forEach(post => {
-                    const dataFormatada = new Date(post.criado_em).toLocaleString('pt-BR');
-                    
-                
-                    const postHtml = `
-                        <div class="post-card" data-id="${post.id}">
-                            <div class="post-header">
-                                <span class="post-author">${post.usuario}</span>
-                                <span class="post-date">${dataFormatada}</span>
-                            </div>
-                            ${post.titulo ? `<div class="post-title">${post.titulo}</div>` : ''}
-                            <div class="post-content">${post.conteudo}</div>
-                            ${post.midia ? `<div class="post-media"><img src="${post.midia}" alt="Mídia do post"></div>` : ''}
-                            
-                            <div class="post-actions">
-                                <button class="btn-acao btn-curtir">
-                                    👍 ${post.curtidas} Curtir
-                                </button>
-                                <button class="btn-acao btn-responder">
-                                    💬 ${post.respostas} Responder
-                                </button>
-                            </div>
-                        </div>
-                    `;
-                    $('#feed').append(postHtml);
+                posts.forEach(post => {
+                    $('#feed').append(montarPost(post));
                 });
+
+                if (proximoCursor) {
+                    $('#feed').append('<button id="btn-carregar-mais" class="btn-acao">Carregar mais</button>');
+                }
             },
             error: function(erro) {
                 console.error('Erro ao carregar posts:', erro);
@@ -61,6 +80,67 @@ $(document).ready(function() {
   
     carregarPosts();
 
+    function atualizarPosts(ids) {
+        $.ajax({
+            type: 'GET',
+            url: `${API_URL}/social/posts/lote`,
+            data: $.param({ ids: ids }, true),
+            success: function(resposta) {
+                resposta.posts.forEach(post => {
+                    const card = $(`.post-card[data-id="${post.id}"]`);
+                    if (post.status !== 'ok') {
+                        card.remove();
+                        return;
+                    }
+                    card.find('.qtd-curtidas').text(post.curtidas);
+                    card.find('.qtd-respostas').text(post.respostas);
+                });
+            },
+            error: function(erro) {
+                console.error('Erro ao atualizar posts:', erro);
+            }
+        });
+    }
+
+    // novos posts, curtidas e respostas chegam pelo canal de eventos; sem ele,
+    // o card afetado é atualizado pelo /posts/lote depois de cada ação
+    let eventos = null;
+    if (window.EventSource) {
+        eventos = new EventSource(`${API_URL}/social/eventos`);
+
+        eventos.addEventListener('post_criado', function(e) {
+            const dados = JSON.parse(e.data);
+            if ($(`.post-card[data-id="${dados.post_id}"]`).length) return;
+            $('#feed > p').remove();
+            $('#feed').prepend(montarPost({ ...dados, id: dados.post_id, curtidas: 0, respostas: 0 }));
+        });
+
+        eventos.addEventListener('post_removido', function(e) {
+            const dados = JSON.parse(e.data);
+            $(`.post-card[data-id="${dados.post_id}"]`).remove();
+        });
+
+        eventos.addEventListener('curtida', function(e) {
+            const dados = JSON.parse(e.data);
+            const qtd = $(`.post-card[data-id="${dados.post_id}"] .qtd-curtidas`);
+            qtd.text(parseInt(qtd.text()) + dados.delta);
+        });
+
+        eventos.addEventListener('resposta', function(e) {
+            const dados = JSON.parse(e.data);
+            const qtd = $(`.post-card[data-id="${dados.post_id}"] .qtd-respostas`);
+            qtd.text(parseInt(qtd.text()) + dados.delta);
+        });
+    }
+
+    function eventosAtivos() {
+        return eventos && eventos.readyState === EventSource.OPEN;
+    }
+
+    $(document).on('click', '#btn-carregar-mais', function() {
+        carregarPosts(proximoCursor);
+    });
+
    
     $('#form-publicar').on('submit', function(e) {
         e.preventDefault();
@@ -87,7 +167,7 @@ $(document).ready(function() {
                 $('#conteudo-post').val('');
                 $('#midia-post').val('');
               
-                carregarPosts();
+                if (!eventosAtivos()) carregarPosts();
             },
             error: function(erro) {
                 console.error('Erro ao publicar:', erro);
@@ -106,7 +186,7 @@ $(document).ready(function() {
             url: `${API_URL}/social/posts/${id}/curtir`, //
             headers: { 'Authorization': `Bearer ${token}` },
             success: function() {
-                carregarPosts(); 
+                if (!eventosAtivos()) atualizarPosts([id]); 
             },
             error: function(xhr) {
                 if(xhr.status === 400) {
@@ -140,7 +220,7 @@ $(document).ready(function() {
                 data: JSON.stringify(dadosResposta), 
                 success: function(response) {
                     alert('Resposta enviada com sucesso!');
-                    carregarPosts(); 
+                    if (!eventosAtivos()) atualizarPosts([id]); 
                 },
                 error: function(erro) {
                     console.error('Erro ao responder:', erro);
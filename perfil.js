@@ -1,15 +1,69 @@
+const API_URL = 'http://127.0.0.1:5000';
+
 const fileInput = document.getElementById("file-input");
 const preview = document.getElementById("preview");
 
+// o arquivo vai como corpo da requisição, sem base64, e o servidor grava em disco enquanto recebe
 fileInput.addEventListener("change", function() {
     const file = this.files[0];
     if (!file) return;
 
-    const reader = new FileReader();
-
-    reader.onload = function(e) {
-        preview.src = e.target.result;
-    };
+    preview.src = URL.createObjectURL(file);
 
-    reader.readAsDataURL(file);
+    fetch(`${API_URL}/midia/upload`, {
+        method: "POST",
+        headers: {
+            "Authorization": `Bearer ${localStorage.getItem("acess_token")}`,
+            "Content-Type": file.type
+        },
+        body: file
+    })
+        .then(resposta => {
+            if (!resposta.ok) throw new Error(resposta.status);
+            return resposta.json();
+        })
+        .then(midia => {
+            URL.revokeObjectURL(preview.src);
+            preview.src = `${API_URL}${midia.url}`;
+        })
+        .catch(erro => {
+            console.error("Erro ao enviar imagem:", erro);
+            alert("Não foi possível enviar a imagem.");
+        });
 });
+
+function idDoPerfil() {
+    const id = new URLSearchParams(window.location.search).get("id");
+    if (id) return id;
+
+    const token = localStorage.getItem("acess_token");
+    if (!token) return null;
+    try {
+        return JSON.parse(atob(token.split(".")[1].replace(/-/g, "+").replace(/_/g, "/"))).sub;
+    } catch (e) {
+        return null;
+    }
+}
+
+// nome, email e as quatro contagens chegam numa única requisição
+function carregarPerfil() {
+    const id = idDoPerfil();
+    if (!id) return;
+
+    fetch(`${API_URL}/social/usuarios/${id}/perfil`)
+        .then(resposta => {
+            if (!resposta.ok) throw new Error(resposta.status);
+            return resposta.json();
+        })
+        .then(perfil => {
+            document.getElementById("nome-input").value = perfil.nome;
+            document.getElementById("email-input").value = perfil.email;
+            document.getElementById("qtd-seguidores").textContent = perfil.seguidores_count;
+            document.getElementById("qtd-seguindo").textContent = perfil.seguindo_count;
+            document.getElementById("qtd-posts").textContent = perfil.comentarios_count;
+            document.getElementById("qtd-enquetes").textContent = perfil.enquetes_count;
+        })
+        .catch(erro => console.error("Erro ao carregar perfil:", erro));
+}
+
+carregarPerfil();